@@ -1,6 +1,9 @@
+from ._core.aconn import PreparedQuery as PreparedQuery
 from ._core.aconn import PySQLXEngine as PySQLXEngine
 from ._core.apool import PySQLXEnginePool as PySQLXEnginePool
+from ._core.conn import PreparedQuerySync as PreparedQuerySync
 from ._core.conn import PySQLXEngineSync as PySQLXEngineSync
 from ._core.const import LOG_CONFIG as LOG_CONFIG
 from ._core.parser import BaseRow as BaseRow
+from ._core.parser import LazyRows as LazyRows
 from ._core.pool import PySQLXEnginePoolSync as PySQLXEnginePoolSync
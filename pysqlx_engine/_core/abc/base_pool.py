@@ -1,16 +1,23 @@
 import asyncio
+import queue
 import threading
 from abc import ABC, abstractmethod
+from bisect import bisect_left
 from collections import deque as Deque
 from random import random
-from typing import List, Union
+from typing import List, NamedTuple, Optional, Set, Tuple, Union
 
-from ..errors import PoolClosedError
+from ..errors import PoolClosedError, PoolTimeoutError
 from ..logger import logger
 from ..util import asleep, monotonic
 from .conn import TPySQLXEngineConn, validate_uri
 from .workers import PySQLXTask, PySQLXTaskSync
 
+# upper bounds in seconds of the histogram buckets, the last bucket has no upper bound.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+HOLD_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0, 60.0, 300.0)
+AGE_BUCKETS = (10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 3600.0 * 4)
+
 
 def get_task_name(task: Union[PySQLXTask, PySQLXTaskSync]) -> str:
 	return task.name
@@ -30,6 +37,11 @@ class BaseConnInfo(ABC):
 		self.keep_alive = keep_alive
 		self.expires_at = monotonic() + self._jitter(value=self.keep_alive, min_pc=-0.05, max_pc=0.0)
 		self.start_at = monotonic()
+		# last time the connection was returned to the pool, used to close the connections idle for too long.
+		self.returned_at = self.start_at
+		self.acquired_at = self.start_at
+		# last time the connection was known to work, by a ping or by a use without error.
+		self.last_verified = self.start_at
 
 	def __repr__(self) -> str:
 		return f"<{self.__class__.__module__}.{self.__class__.__name__} {self.name!r} at 0x{id(self):x}>"
@@ -45,7 +57,7 @@ class BaseConnInfo(ABC):
 
 	@property
 	def reusable(self) -> bool:
-		return self.healthy and self.conn.connected and self._can_reuse
+		return self.conn.connected and self._can_reuse
 
 	@abstractmethod
 	def close(self) -> None: ...
@@ -73,6 +85,121 @@ class BaseConnInfo(ABC):
 		return value * (1.0 + ((max_pc - min_pc) * random()) + min_pc)
 
 
+class IdleStack:
+	"""
+	The idle connections of a pool, a deque used as a stack ("lifo") or as a queue ("fifo").
+
+	The connections are put on the right and the oldest ones are on the left. "lifo" takes the most recently
+	returned connection, so a small hot set serves the traffic and the cold tail can be trimmed, "fifo" takes
+	the least recently returned one and spreads the load over every connection.
+	"""
+
+	__slots__ = ("_conns", "maxsize", "lifo")
+
+	def __init__(self, maxsize: int, policy: str = "fifo"):
+		self._conns: Deque = Deque()
+		self.maxsize = maxsize
+		self.lifo = policy == "lifo"
+
+	def __len__(self) -> int:
+		return len(self._conns)
+
+	def qsize(self) -> int:
+		return len(self._conns)
+
+	def empty(self) -> bool:
+		return not self._conns
+
+	def put_nowait(self, conn: BaseConnInfo) -> None:
+		if len(self._conns) >= self.maxsize:
+			raise queue.Full
+		self._conns.append(conn)
+
+	def get_nowait(self) -> BaseConnInfo:
+		try:
+			return self._conns.pop() if self.lifo else self._conns.popleft()
+		except IndexError:
+			raise queue.Empty from None
+
+	def get_oldest_nowait(self, n: int) -> List[BaseConnInfo]:
+		"""
+		Take up to *n* connections from the oldest ones.
+		"""
+		conns = []
+		for _ in range(n):
+			try:
+				conns.append(self._conns.popleft())
+			except IndexError:
+				break
+		return conns
+
+	def put_oldest_nowait(self, conns: List[BaseConnInfo]) -> List[BaseConnInfo]:
+		"""
+		Put back the connections taken with get_oldest_nowait, where they are taken last.
+
+		Returns the connections that do not fit.
+		"""
+		fit = conns[: max(self.maxsize - len(self._conns), 0)]
+		if self.lifo:
+			self._conns.extendleft(reversed(fit))
+		else:
+			self._conns.extend(fit)
+		return conns[len(fit) :]
+
+
+class HistogramInfo(NamedTuple):
+	buckets: Tuple[float, ...]
+	counts: Tuple[int, ...]
+	count: int
+	sum: float
+	max: float
+
+
+class Histogram:
+	"""
+	A histogram of durations in seconds with fixed buckets, *counts[i]* is the number of values
+	less than or equal to *buckets[i]* and greater than the previous bucket, the last count has no upper bound.
+
+	Recording is a bisect and a few additions, cheap enough to leave on.
+	"""
+
+	__slots__ = ("buckets", "counts", "count", "sum", "max")
+
+	def __init__(self, buckets: Tuple[float, ...]):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.sum = 0.0
+		self.max = 0.0
+
+	def record(self, value: float) -> None:
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.count += 1
+		self.sum += value
+		if value > self.max:
+			self.max = value
+
+	def info(self) -> HistogramInfo:
+		return HistogramInfo(
+			buckets=self.buckets, counts=tuple(self.counts), count=self.count, sum=self.sum, max=self.max
+		)
+
+
+class PoolStats(NamedTuple):
+	size: int
+	idle: int
+	in_use: int
+	waiting: int
+	connecting: int
+	created: int
+	closed: int
+	failed: int
+	timeouts: int
+	acquire_wait: HistogramInfo
+	hold_time: HistogramInfo
+	age: HistogramInfo
+
+
 class Worker:
 	_worker_num = 0
 
@@ -118,6 +245,14 @@ class BasePool(ABC):
 		conn_timeout: float = 30.0,
 		keep_alive: float = 60 * 15,
 		check_interval: float = 2.0,
+		max_concurrent_connects: int = 5,
+		idle_timeout: Optional[float] = 60 * 10,
+		min_idle: int = 0,
+		max_idle: Optional[int] = None,
+		policy: str = "fifo",
+		health_check: str = "periodic",
+		ping_sql: Optional[str] = None,
+		reset_sql: Optional[str] = None,
 	):
 		"""
 		:param uri: The connection URI.
@@ -127,6 +262,18 @@ class BasePool(ABC):
 		:param keep_alive: The maximum time in seconds to keep a connection alive.
 		:param check_interval: The interval in seconds to check the pool for expired connections.
 		:param monitor_batch_size: The number of connections to check per interval.
+		:param max_concurrent_connects: The maximum number of connections opened at the same time when the pool grows.
+		:param idle_timeout: The time in seconds an idle connection is kept above min_size, None keeps it.
+		:param min_idle: The minimum number of idle connections to keep, when the max_size allows it.
+		:param max_idle: The maximum number of idle connections to keep, None is the max_size.
+		:param policy: "lifo" takes the most recently returned connection, "fifo" the least recently returned one.
+		:param health_check: When the connections are checked: "periodic" by the monitor, "never",
+			or "on_borrow_if_idle_gt=<secs>" when a connection not verified for more than secs is taken.
+		:param ping_sql: The SQL used to check a connection, e.g. "SELECT 1". None uses is_healthy, a local flag.
+		:param reset_sql: The SQL run after the rollback of a connection returned with an open transaction,
+			e.g. "RESET ALL". The connection is closed only when the reset fails.
+			"DISCARD ALL" also drops the prepared statements cached by the core,
+			use it only with "statement_cache_size=0" in the uri.
 		"""
 		# check if the uri is valid
 		validate_uri(uri)
@@ -136,6 +283,8 @@ class BasePool(ABC):
 		assert conn_timeout > 0, "conn_timeout must be greater than 0"
 		assert keep_alive > 0, "max_lifetime must be greater than 0"
 		assert check_interval > 0, "check_interval must be greater than 0"
+		assert max_concurrent_connects > 0, "max_concurrent_connects must be greater than 0"
+		assert idle_timeout is None or idle_timeout > 0, "idle_timeout must be greater than 0"
 
 		self._conn_timeout = conn_timeout or 30.0
 		self._keep_alive = keep_alive or 60 * 15
@@ -148,14 +297,32 @@ class BasePool(ABC):
 		self._name = f"{self.__class__.__name__}-{self._num_pool}"
 
 		self._size = 0
-		self._pool: Deque[BaseConnInfo] = Deque()
 		self._opened = False
 		self._opening = False
 
-		self._growing = False
-		self._waiting = 0
+		# connections being opened for the waiters
+		self._connecting = 0
+		self._max_concurrent_connects = max_concurrent_connects
+		# callers waiting for a connection, the oldest is served first when a connection is returned.
+		self._waiters: Deque = Deque()
 
 		self._min_size, self._max_size = self._check_size(min_size, max_size)
+		self._idle_timeout = idle_timeout
+		self._min_idle, self._max_idle = self._check_idle(min_idle, max_idle)
+		self._pool = IdleStack(maxsize=self._max_size, policy=self._check_policy(policy))
+		self._health_check, self._health_check_idle = self._check_health_check(health_check)
+		self._ping_sql = ping_sql
+		self._reset_sql = reset_sql
+
+		# statistics, see stats(), the sync pool updates them from the caller and grower threads.
+		self._stats_lock = threading.Lock()
+		self._conns: Set[BaseConnInfo] = set()
+		self._created = 0
+		self._closed = 0
+		self._failed = 0
+		self._timeouts = 0
+		self._acquire_wait = Histogram(WAIT_BUCKETS)
+		self._hold_time = Histogram(HOLD_BUCKETS)
 
 		self._lock: Union[asyncio.Lock, threading.RLock]
 
@@ -168,6 +335,66 @@ class BasePool(ABC):
 	def closed(self) -> bool:
 		return self._opened is False
 
+	def stats(self) -> PoolStats:
+		"""
+		Return a snapshot of the pool statistics.
+
+		The counters and the histograms of the acquire wait and hold times are since the pool was created,
+		the age is the time since each open connection was created.
+		"""
+		now = monotonic()
+		age = Histogram(AGE_BUCKETS)
+		with self._stats_lock:
+			for conn in self._conns:
+				age.record(now - conn.start_at)
+
+			idle = self._pool.qsize()
+			return PoolStats(
+				size=self._size,
+				idle=idle,
+				in_use=max(self._size - idle, 0),
+				waiting=sum(1 for waiter in list(self._waiters) if not waiter.done()),
+				connecting=self._connecting,
+				created=self._created,
+				closed=self._closed,
+				failed=self._failed,
+				timeouts=self._timeouts,
+				acquire_wait=self._acquire_wait.info(),
+				hold_time=self._hold_time.info(),
+				age=age.info(),
+			)
+
+	def _record_acquire(self, conn: BaseConnInfo, start_time: float) -> None:
+		conn.acquired_at = monotonic()
+		with self._stats_lock:
+			self._acquire_wait.record(conn.acquired_at - start_time)
+
+	def _record_release(self, conn: BaseConnInfo) -> None:
+		conn.returned_at = monotonic()
+		with self._stats_lock:
+			self._hold_time.record(conn.returned_at - conn.acquired_at)
+
+	def _record_created(self, conn: BaseConnInfo) -> None:
+		with self._stats_lock:
+			self._size += 1
+			self._conns.add(conn)
+			self._created += 1
+
+	def _record_closed(self, conn: BaseConnInfo) -> None:
+		with self._stats_lock:
+			self._size -= 1
+			self._conns.discard(conn)
+			self._closed += 1
+
+	def _record_failed(self) -> None:
+		with self._stats_lock:
+			self._failed += 1
+
+	def _timeout_error(self, message: str) -> PoolTimeoutError:
+		with self._stats_lock:
+			self._timeouts += 1
+		return PoolTimeoutError(message)
+
 	def _check_size(self, min_size: int, max_size: Union[int, None]):
 		if max_size is None:
 			max_size = min_size + 1
@@ -183,6 +410,70 @@ class BasePool(ABC):
 
 		return min_size, max_size
 
+	def _conns_to_grow(self, waiting: int) -> int:
+		"""
+		Number of connections to open for *waiting* callers without an idle connection.
+
+		The connections already being opened count for the waiters, the size and the concurrency limit.
+		"""
+		return max(
+			0,
+			min(
+				waiting - self._connecting,
+				self._max_size - self._size - self._connecting,
+				self._max_concurrent_connects - self._connecting,
+			),
+		)
+
+	def _check_idle(self, min_idle: int, max_idle: Union[int, None]):
+		if max_idle is None:
+			max_idle = self._max_size
+
+		if min_idle < 0:
+			raise ValueError("min_idle must be greater than or equal to 0")
+
+		elif max_idle < min_idle:
+			raise ValueError("min_idle must be less than or equal to max_idle")
+
+		elif max_idle > self._max_size:
+			raise ValueError("max_idle must be less than or equal to max_size")
+
+		return min_idle, max_idle
+
+	def _check_policy(self, policy: str) -> str:
+		if policy not in ("lifo", "fifo"):
+			raise ValueError('policy must be "lifo" or "fifo"')
+		return policy
+
+	def _check_health_check(self, health_check: str) -> Tuple[str, float]:
+		if health_check in ("never", "periodic"):
+			return health_check, 0.0
+
+		mode, _, idle = health_check.partition("=")
+		if mode == "on_borrow_if_idle_gt":
+			try:
+				if float(idle) >= 0:
+					return "on_borrow", float(idle)
+			except ValueError:
+				pass
+
+		raise ValueError('health_check must be "never", "periodic" or "on_borrow_if_idle_gt=<secs>"')
+
+	def _can_trim(self, conn: BaseConnInfo, idle: int, trimmed: int) -> bool:
+		"""
+		Check if the idle *conn* can be closed, *idle* is the number of the other idle connections.
+
+		The pool never goes below min_size or min_idle. Above max_idle the connection is closed,
+		otherwise a connection idle for longer than idle_timeout is closed, one per check so the pool shrinks progressively.
+		"""
+		if self._size <= self._min_size or idle < self._min_idle:
+			return False
+
+		if idle >= self._max_idle:
+			return True
+
+		return trimmed == 0 and self._idle_timeout is not None and monotonic() - conn.returned_at >= self._idle_timeout
+
 	def _check_closed(self) -> None:
 		if self.closed is True and self._opening is False:
 			raise PoolClosedError("Pool is closed")
@@ -200,7 +491,19 @@ class BasePool(ABC):
 	def _put_conn(self, conn: BaseConnInfo) -> None: ...
 
 	@abstractmethod
-	def _get_ready_conn(self) -> BaseConnInfo: ...
+	def _put_idle(self, conn: BaseConnInfo) -> bool: ...
+
+	@abstractmethod
+	def _put_oldest_idle(self, conns: List[BaseConnInfo]) -> List[BaseConnInfo]: ...
+
+	@abstractmethod
+	def _reset(self, conn: BaseConnInfo) -> bool: ...
+
+	@abstractmethod
+	def _verify(self, conn: BaseConnInfo, idle: float) -> bool: ...
+
+	@abstractmethod
+	def _get_ready_conn(self, timeout: float) -> BaseConnInfo: ...
 
 	@abstractmethod
 	def _get_conn(self) -> BaseConnInfo: ...
@@ -1,12 +1,14 @@
 import asyncio
-from asyncio import Queue, Semaphore
+import queue
+from asyncio import Future, Semaphore
 from contextlib import asynccontextmanager
 from time import monotonic
+from typing import List, Optional, Set
 
 from pysqlx_engine import PySQLXEngine
 
 from .abc.base_pool import BaseConnInfo, BaseMonitor, BasePool, Worker, logger
-from .errors import PoolAlreadyClosedError, PoolAlreadyStartedError, PoolTimeoutError
+from .errors import PoolAlreadyClosedError, PoolAlreadyStartedError
 from .util import agather, asleep, aspawn
 
 __all__ = ["PySQLXEnginePool"]
@@ -29,29 +31,40 @@ class Monitor(BaseMonitor):
 			async with self.pool._monitor_lock:
 				await self.pool._monitor_semaphore.acquire()
 				try:
-					conns_to_check = min(self.pool._pool.qsize(), self.pool._batch_size)
-					for _ in range(conns_to_check):
-						try:
-							conn = self.pool._pool.get_nowait()
-						except asyncio.QueueEmpty:
-							break
+					# the oldest connections are checked and the kept ones are put back where they are taken last
+					conns = self.pool._pool.get_oldest_nowait(self.pool._batch_size)
+					kept = []
+					trimmed = 0
+					for i, conn in enumerate(conns):
+						idle = self.pool._pool.qsize() + len(kept) + len(conns) - i - 1
 
 						if self.pool._size > self.pool._max_size:
 							logger.debug("Monitor: Pool size is above minimum, closing connection.")
 							await self.pool._del_conn_unchecked(conn=conn)
 
-						elif conn.healthy is False or conn.reusable is False:
+						elif conn.reusable is False or (
+							self.pool._health_check == "periodic"
+							and not await self.pool._verify(conn=conn, idle=self.pool._check_interval)
+						):
 							logger.debug(f"Connection: {conn} is unhealthy, closing.")
 							await self.pool._del_conn_unchecked(conn=conn)
 
+						elif self.pool._can_trim(conn=conn, idle=idle, trimmed=trimmed):
+							logger.debug(f"Monitor: Connection {conn} is idle for too long, closing.")
+							await self.pool._del_conn_unchecked(conn=conn)
+							trimmed += 1
+
 						elif monotonic() >= conn.expires_at:
 							logger.debug(f"Monitor: Connection {conn} has expired, renewing.")
 							conn.renew_expires_at()
-							self.pool._pool.put_nowait(conn)
+							kept.append(conn)
 
 						else:
 							logger.debug(f"Monitor: Reusing healthy connection {conn}.")
-							self.pool._pool.put_nowait(conn)
+							kept.append(conn)
+
+					for conn in self.pool._put_oldest_idle(kept):
+						await self.pool._del_conn_unchecked(conn=conn)
 
 					if self.pool._size < self.pool._min_size:
 						logger.debug("Monitor: Pool size is below minimum, creating new connections.")
@@ -60,11 +73,16 @@ class Monitor(BaseMonitor):
 						)
 						for conn in new_conns:
 							await self.pool._put_conn_unchecked(conn)
-					elif self.pool._growing and self.pool._size < self.pool._max_size:
-						logger.debug("Monitor: Pool is growing, creating new connections.")
-						conn = await self.pool._new_conn_unchecked()
-						await self.pool._put_conn_unchecked(conn)
-						self.pool._growing = False
+
+					idle = self.pool._pool.qsize()
+					conns_to_open = min(
+						self.pool._min_idle - idle, self.pool._max_size - self.pool._size - self.pool._connecting
+					)
+					if conns_to_open > 0:
+						logger.debug("Monitor: Idle connections are below min_idle, creating new connections.")
+						new_conns = await agather(*[self.pool._new_conn_unchecked() for _ in range(conns_to_open)])
+						for conn in new_conns:
+							await self.pool._put_conn_unchecked(conn)
 
 				finally:
 					# Ensure that semaphore is released even if an error occurs
@@ -88,6 +106,18 @@ class PySQLXEnginePool(BasePool):
 	:param keep_alive: The maximum time in seconds to keep a connection alive.
 	:param check_interval: The interval in seconds to check the pool for expired connections.
 	:param monitor_batch_size: The number of connections to check per interval.
+	:param max_concurrent_connects: The maximum number of connections opened at the same time when the pool grows.
+	:param idle_timeout: The time in seconds an idle connection is kept above min_size, None keeps it.
+	:param min_idle: The minimum number of idle connections to keep, when the max_size allows it.
+	:param max_idle: The maximum number of idle connections to keep, None is the max_size.
+	:param policy: "lifo" takes the most recently returned connection, "fifo" the least recently returned one.
+	:param health_check: When the connections are checked: "periodic" by the monitor, "never",
+		or "on_borrow_if_idle_gt=<secs>" when a connection not verified for more than secs is taken.
+	:param ping_sql: The SQL used to check a connection, e.g. "SELECT 1". None uses is_healthy, a local flag.
+	:param reset_sql: The SQL run after the rollback of a connection returned with an open transaction,
+		e.g. "RESET ALL". The connection is closed only when the reset fails.
+		"DISCARD ALL" also drops the prepared statements cached by the core,
+		use it only with "statement_cache_size=0" in the uri.
 
 	"""
 
@@ -100,6 +130,14 @@ class PySQLXEnginePool(BasePool):
 		keep_alive: float = 60 * 15,
 		check_interval: float = 5.0,
 		monitor_batch_size: int = 10,  # Number of connections to check per interval
+		max_concurrent_connects: int = 5,
+		idle_timeout: Optional[float] = 60 * 10,
+		min_idle: int = 0,
+		max_idle: Optional[int] = None,
+		policy: str = "fifo",
+		health_check: str = "periodic",
+		ping_sql: Optional[str] = None,
+		reset_sql: Optional[str] = None,
 	):
 		super().__init__(
 			uri=uri,
@@ -108,8 +146,15 @@ class PySQLXEnginePool(BasePool):
 			conn_timeout=conn_timeout,
 			keep_alive=keep_alive,
 			check_interval=check_interval,
+			max_concurrent_connects=max_concurrent_connects,
+			idle_timeout=idle_timeout,
+			min_idle=min_idle,
+			max_idle=max_idle,
+			policy=policy,
+			health_check=health_check,
+			ping_sql=ping_sql,
+			reset_sql=reset_sql,
 		)
-		self._pool: Queue[ConnInfo] = Queue(maxsize=self._max_size)
 		self._semaphore: Semaphore = Semaphore(self._max_size)
 		self._monitor_lock: asyncio.Lock = asyncio.Lock()
 		self._monitor_semaphore: Semaphore = Semaphore(1)
@@ -119,12 +164,17 @@ class PySQLXEnginePool(BasePool):
 		self._monitor = None
 		self._batch_size = monitor_batch_size
 		self._lock = asyncio.Lock()
+		self._growers: Set[asyncio.Task] = set()
 
 	async def _new_conn_unchecked(self) -> ConnInfo:
 		conn = PySQLXEngine(uri=self.uri)
-		await conn.connect()
+		try:
+			await conn.connect()
+		except Exception:
+			self._record_failed()
+			raise
 		conn_info = ConnInfo(conn=conn, keep_alive=self._keep_alive)
-		self._size += 1
+		self._record_created(conn_info)
 		logger.debug(f"Pool: New connection created: {conn_info} PoolSize: {self._size}")
 		return conn_info
 
@@ -132,39 +182,143 @@ class PySQLXEnginePool(BasePool):
 		if use_lock:
 			async with self._lock:
 				await conn.close()
-				self._size -= 1
 		else:
 			await conn.close()
-			self._size -= 1
+		self._record_closed(conn)
 		logger.debug(f"Pool: Connection closed: {conn} PoolSize: {self._size}")
 
 	async def _put_conn_unchecked(self, conn: ConnInfo) -> None:
-		if conn.healthy and conn.reusable and self._size <= self._max_size:
-			try:
-				await asyncio.wait_for(self._pool.put(conn), timeout=1)
+		if conn.reusable and self._size <= self._max_size:
+			if self._put_idle(conn):
 				logger.debug(f"Pool: Connection returned to pool: {conn}")
-			except (asyncio.QueueFull, asyncio.TimeoutError):
+			else:
 				logger.debug(f"Pool: Pool is full. Closing connection: {conn}")
 				await self._del_conn_unchecked(conn)
 		else:
 			logger.debug(f"Pool: Connection is not reusable or expired: {conn}")
 			await self._del_conn_unchecked(conn)
 
-	async def _get_ready_conn(self) -> BaseConnInfo:
+	def _put_idle(self, conn: ConnInfo) -> bool:
+		"""
+		Hand the connection to the oldest waiter, or keep it idle when nobody is waiting.
+
+		Returns False when the pool is full.
+		"""
+		if self._hand_over(conn):
+			return True
 		try:
-			conn = await asyncio.wait_for(self._pool.get(), timeout=BaseConnInfo._jitter(value=0.3))
-			return conn
-		except asyncio.TimeoutError:
+			self._pool.put_nowait(conn)
+			return True
+		except queue.Full:
+			return False
+
+	def _put_oldest_idle(self, conns: List[ConnInfo]) -> List[ConnInfo]:
+		"""
+		Hand the connections checked by the monitor to the waiters, or put them back with the oldest ones.
+
+		Returns the connections that do not fit.
+		"""
+		conns = [conn for conn in conns if not self._hand_over(conn)]
+		return self._pool.put_oldest_nowait(conns)
+
+	def _hand_over(self, conn: ConnInfo) -> bool:
+		while self._waiters:
+			waiter: Future = self._waiters.popleft()
+			if not waiter.done():
+				waiter.set_result(conn)
+				return True
+		return False
+
+	async def _reset(self, conn: ConnInfo) -> bool:
+		"""
+		Roll back the transaction left open on *conn* and run the reset_sql, False when it fails.
+		"""
+		logger.warning("Transaction is still active, please commit or rollback before returning the connection.")
+		try:
+			await conn.conn.rollback()
+			if self._reset_sql is not None:
+				await conn.conn.raw_cmd(sql=self._reset_sql)
+			return True
+		except Exception as e:
+			logger.error(f"Pool: Error resetting the connection {conn}, closing it: {e}")
+			return False
+
+	async def _verify(self, conn: ConnInfo, idle: float) -> bool:
+		"""
+		Check *conn* if it was not verified in the last *idle* seconds, False when it is broken.
+		"""
+		if monotonic() - conn.last_verified <= idle:
+			return True
+
+		if self._ping_sql is None:
+			healthy = conn.healthy
+		else:
+			try:
+				await conn.conn.raw_cmd(sql=self._ping_sql)
+				healthy = True
+			except Exception as e:
+				logger.debug(f"Pool: Ping failed on connection {conn}: {e}")
+				healthy = False
+
+		if healthy:
+			conn.last_verified = monotonic()
+		return healthy
+
+	async def _get_ready_conn(self, timeout: float) -> Optional[ConnInfo]:
+		"""
+		Return an idle connection or wait in line until one is returned, None on timeout.
+		"""
+		try:
+			return self._pool.get_nowait()
+		except queue.Empty:
+			pass
+
+		waiter: Future = asyncio.get_running_loop().create_future()
+		self._waiters.append(waiter)
+		self._grow()
+		try:
+			await asyncio.wait((waiter,), timeout=max(timeout, 0.0))
+		except BaseException:
+			# the caller was cancelled after the connection was handed over, give it to the next one
+			if waiter.done() and not waiter.cancelled() and waiter.result() is not None:
+				self._put_idle(waiter.result())
+			waiter.cancel()
+			raise
+
+		if not waiter.done():
+			waiter.cancel()
+			self._waiters.remove(waiter)
+			return None
+		return waiter.result()
+
+	def _grow(self) -> None:
+		"""
+		Open connections in parallel for the callers waiting without an idle connection.
+		"""
+		waiting = sum(1 for waiter in self._waiters if not waiter.done())
+		conns = self._conns_to_grow(waiting=waiting)
+		if conns == 0:
 			return
 
-	async def _check_grow(self, value: int) -> None:
-		async with self._lock:
-			self._waiting += value
-			if self._size >= self._max_size:
-				return
+		logger.debug(f"Pool: Growing {conns} connections, Waiting: {waiting} PoolSize: {self._size}")
+		self._connecting += conns
+		task = asyncio.get_running_loop().create_task(agather(*[self._grow_conn() for _ in range(conns)]))
+		self._growers.add(task)
+		task.add_done_callback(self._growers.discard)
 
-			self._growing = self._waiting > 1
-			logger.debug(f"Pool: Growing: {self._growing} Waiting: {self._waiting}")
+	async def _grow_conn(self) -> None:
+		try:
+			conn = await self._new_conn_unchecked()
+		except Exception as e:
+			logger.error(f"Pool: Error opening a new connection: {e}")
+			return
+		finally:
+			self._connecting -= 1
+
+		if self.closed:
+			await self._del_conn_unchecked(conn)
+		else:
+			await self._put_conn_unchecked(conn)
 
 	async def _get_conn(self) -> ConnInfo:
 		self._check_closed()
@@ -177,25 +331,32 @@ class PySQLXEnginePool(BasePool):
 			deadline -= monotonic() - start  # Adjust deadline for time spent waiting for semaphore
 			logger.debug(f"Acquired semaphore in {monotonic() - start:.5f} seconds")
 		except asyncio.TimeoutError:
-			raise PoolTimeoutError("Timeout waiting for a connection semaphore")
+			raise self._timeout_error("Timeout waiting for a connection semaphore")
 		try:
-			await self._check_grow(1)
 			while True:
 				timeout = deadline - monotonic()
 				if timeout < 0.0:
-					raise PoolTimeoutError("Timeout waiting for a connection")
+					raise self._timeout_error("Timeout waiting for a connection")
 
-				conn = await self._get_ready_conn()
-				if conn:
-					logger.debug(f"Pool: Connection: {conn} retrieved in {monotonic() - start_time:.5f} seconds.")
-					return conn
+				conn = await self._get_ready_conn(timeout=timeout)
+				if conn is None:
+					self._check_closed()
+					raise self._timeout_error("Timeout waiting for a connection")
 
-				await asleep(BaseConnInfo._jitter(value=0.3))
+				if self._health_check != "on_borrow" or await self._verify(conn=conn, idle=self._health_check_idle):
+					break
+
+				logger.debug(f"Pool: Connection {conn} failed the health check, closing.")
+				await self._del_conn_unchecked(conn)
+
+			self._record_acquire(conn, start_time=start_time)
+			logger.debug(f"Pool: Connection: {conn} retrieved in {monotonic() - start_time:.5f} seconds.")
+			return conn
 		finally:
-			await self._check_grow(-1)
 			self._semaphore.release()
 
 	async def _put_conn(self, conn: ConnInfo) -> None:
+		self._record_release(conn)
 		try:
 			async with self._lock:
 				await self._put_conn_unchecked(conn)
@@ -214,7 +375,7 @@ class PySQLXEnginePool(BasePool):
 			try:
 				conns = await agather(*tasks)
 				for conn in conns:
-					await self._pool.put(conn)
+					self._pool.put_nowait(conn)
 			except Exception as e:
 				logger.error(f"Pool: Error during pool initialization: {e}")
 				raise
@@ -247,9 +408,12 @@ class PySQLXEnginePool(BasePool):
 		except Exception as e:
 			logger.error(f"Pool: Error during connection usage: {e}")
 			raise
+		else:
+			# the connection worked, it is not pinged until it is idle again
+			conn.last_verified = monotonic()
 		finally:
-			if conn.conn._on_transaction:
-				logger.warning("Transaction is still active, please commit or rollback before closing the connection.")
+			if conn.conn._on_transaction and not await self._reset(conn):
+				self._record_release(conn)
 				await self._del_conn_unchecked(conn, use_lock=True)
 			else:
 				await self._put_conn(conn)
@@ -261,9 +425,19 @@ class PySQLXEnginePool(BasePool):
 		logger.info("Pool: Stopping the connection pool.")
 		self._opened = False
 
+		# Wake up the waiters, they raise PoolClosedError
+		while self._waiters:
+			waiter: Future = self._waiters.popleft()
+			if not waiter.done():
+				waiter.set_result(None)
+
+		# Wait for the connections being opened, they are closed because the pool is closed
+		if self._growers:
+			await asyncio.wait(self._growers)
+
 		# Close all connections
 		while not self._pool.empty():
-			conn = await self._pool.get()
+			conn = self._pool.get_nowait()
 			await self._del_conn_unchecked(conn)
 
 		# Stop all workers
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class CacheInfo(NamedTuple):
+	hits: int
+	misses: int
+	evictions: int
+	size: int
+	maxsize: int
+
+
+class LRUCache:
+	"""
+	A bounded and thread-safe LRU cache with hit, miss and eviction counters.
+
+	When the cache is full, the least recently used entry is evicted.
+	"""
+
+	__slots__ = ("_data", "_lock", "maxsize", "hits", "misses", "evictions")
+
+	def __init__(self, maxsize: int = 128):
+		assert maxsize > 0, "maxsize must be greater than 0"
+		self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def __contains__(self, key: Hashable) -> bool:
+		return key in self._data
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		with self._lock:
+			try:
+				value = self._data[key]
+			except KeyError:
+				self.misses += 1
+				return default
+			self._data.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def set(self, key: Hashable, value: Any) -> Any:
+		"""
+		Store *value* under *key* and return the value kept in the cache.
+
+		If another thread already stored the key, the existing value wins.
+		"""
+		with self._lock:
+			if key in self._data:
+				self._data.move_to_end(key)
+				return self._data[key]
+
+			self._data[key] = value
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+				self.evictions += 1
+			return value
+
+	def get_or_set(self, key: Hashable, factory: Callable[[], T]) -> T:
+		"""
+		Return the cached value for *key*, calling *factory* to build it on a miss.
+
+		The factory runs outside the lock, so a slow factory does not block other readers.
+		"""
+		value = self.get(key, _MISSING)
+		if value is _MISSING:
+			value = self.set(key, factory())
+		return value
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+			self.hits = self.misses = self.evictions = 0
+
+	def info(self) -> CacheInfo:
+		return CacheInfo(
+			hits=self.hits, misses=self.misses, evictions=self.evictions, size=len(self._data), maxsize=self.maxsize
+		)
@@ -1,27 +1,57 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Type, Union
 
 import pysqlx_core
-from pydantic import BaseModel
 
 # ParserSQL,
 # import necessary using _core to not subscribe default parser
 from .const import ISOLATION_LEVEL, LOG_CONFIG
 from .errors import AlreadyConnectedError, NotConnectedError, ParameterInvalidValueError
-from .helper import fe_sql, model_parameter_error_message, not_connected_error_message
+from .helper import fe_sql, not_connected_error_message, parameters_type_error_message
 from .logger import logger
-from .parser import BaseRow, MyModel, ParserIn, ParserSQL
-from .util import check_isolation_level, check_sql_and_parameters, create_log_line, pysqlx_get_error
+from .parser import MyModel, ParserIn, ParserSQL
+from .util import (
+	build_delete_sql,
+	build_execute_many,
+	build_first_sql,
+	build_insert_sql,
+	build_rows_parameters,
+	build_statement_cache_uri,
+	build_stream_sql,
+	build_update_sql,
+	build_upsert_parameters,
+	build_upsert_sql,
+	build_values_batches,
+	check_columns,
+	check_identifier,
+	check_isolation_level,
+	check_many_parameters,
+	check_model,
+	check_param_types,
+	check_prepared_parameters,
+	check_sql_and_parameters,
+	check_table,
+	check_trusted_columns,
+	create_log_line,
+	get_constructor,
+	get_last_rows,
+	get_rows_columns,
+	get_validator,
+	pysqlx_get_error,
+)
 
 
 class PySQLXEngineSync:
-	__slots__ = ["uri", "connected", "_conn", "_provider", "_on_transaction"]
+	__slots__ = ["uri", "connected", "trusted", "_conn", "_provider", "_on_transaction", "statement_cache_size"]
 
 	uri: str
 	connected: bool
+	trusted: bool
+	statement_cache_size: int
 	_on_transaction: bool
 
-	def __init__(self, uri: str):
+	def __init__(self, uri: str, trusted: bool = False, statement_cache_size: Optional[int] = None):
 		self.connected: bool = False
+		self.trusted: bool = trusted
 		self._on_transaction: bool = False
 
 		_providers = ["postgresql", "mysql", "sqlserver", "sqlite"]
@@ -40,6 +70,11 @@ class PySQLXEngineSync:
 			if self.uri.startswith(prov):
 				self._provider = prov
 
+		# the prepared statements are kept by the core, only the size of its cache is set here.
+		self.uri, self.statement_cache_size = build_statement_cache_uri(
+			provider=self._provider, uri=self.uri, size=statement_cache_size
+		)
+
 	def __del__(self):
 		self.close()
 
@@ -89,8 +124,7 @@ class PySQLXEngineSync:
 		logger.debug(fe_sql(sql=log_sql))
 
 	def _run(self, func, sql: str, parameters: Optional[dict] = None, model: Optional[MyModel] = None):
-		if model is not None and not issubclass(model, (BaseRow, BaseModel)):
-			raise TypeError(model_parameter_error_message())
+		check_model(model=model)
 
 		try:
 			stmt = pysqlx_core.PySQLxStatement(provider=self._provider, sql=sql, params=parameters)
@@ -117,29 +151,240 @@ class PySQLXEngineSync:
 	def raw_cmd(self, sql: str):
 		return self._run(func=self._conn.raw_cmd_sync, sql=sql)
 
-	def query(self, sql: str, parameters: Optional[dict] = None, model: Optional[MyModel] = None):
+	def query(
+		self,
+		sql: str,
+		parameters: Optional[dict] = None,
+		model: Optional[MyModel] = None,
+		trusted: Optional[bool] = None,
+		lazy: bool = False,
+	):
 		self._pre_validate(sql=sql, parameters=parameters)
 		result = self._run(func=self._conn.query_typed_sync, sql=sql, parameters=parameters, model=model)
-		return ParserIn(result=result, model=model).parse()
+		trusted = self.trusted if trusted is None else trusted
+		parser = ParserIn(result=result, model=model, trusted=trusted)
+		return parser.parse_lazy() if lazy else parser.parse()
 
 	def query_as_dict(self, sql: str, parameters: Optional[dict] = None):
 		self._pre_validate(sql=sql, parameters=parameters)
 		return self._run(self._conn.query_all_sync, sql=sql, parameters=parameters)
 
-	def query_first(self, sql: str, parameters: Optional[dict] = None, model: Optional[MyModel] = None):
+	def query_as_columns(self, sql: str, parameters: Optional[dict] = None):
+		self._pre_validate(sql=sql, parameters=parameters)
+		result = self._run(self._conn.query_typed_sync, sql=sql, parameters=parameters)
+		return ParserIn(result=result).parse_columns()
+
+	def query_as_numpy(self, sql: str, parameters: Optional[dict] = None):
 		self._pre_validate(sql=sql, parameters=parameters)
-		result = self._run(self._conn.query_typed_sync, sql=sql, parameters=parameters, model=model)
-		return ParserIn(result=result, model=model).parse_first()
+		result = self._run(self._conn.query_typed_sync, sql=sql, parameters=parameters)
+		return ParserIn(result=result).parse_numpy()
+
+	def query_as_dataframe(self, sql: str, parameters: Optional[dict] = None):
+		self._pre_validate(sql=sql, parameters=parameters)
+		result = self._run(self._conn.query_typed_sync, sql=sql, parameters=parameters)
+		return ParserIn(result=result).parse_dataframe()
+
+	def query_first(
+		self,
+		sql: str,
+		parameters: Optional[dict] = None,
+		model: Optional[MyModel] = None,
+		trusted: Optional[bool] = None,
+	):
+		self._pre_validate(sql=sql, parameters=parameters)
+		result = self._run(
+			self._conn.query_typed_sync,
+			sql=build_first_sql(provider=self._provider, sql=sql),
+			parameters=parameters,
+			model=model,
+		)
+		trusted = self.trusted if trusted is None else trusted
+		return ParserIn(result=result, model=model, trusted=trusted).parse_first()
 
 	def query_first_as_dict(self, sql: str, parameters: Optional[dict] = None):
 		self._pre_validate(sql=sql, parameters=parameters)
-		row = self._run(self._conn.query_one_sync, sql=sql, parameters=parameters)
+		row = self._run(
+			self._conn.query_one_sync, sql=build_first_sql(provider=self._provider, sql=sql), parameters=parameters
+		)
 		return row if row else None
 
+	def query_as_tuples(self, sql: str, parameters: Optional[dict] = None, named: bool = False):
+		self._pre_validate(sql=sql, parameters=parameters)
+		result = self._run(self._conn.query_typed_sync, sql=sql, parameters=parameters)
+		return ParserIn(result=result).parse_tuples(named=named)
+
+	def query_first_as_tuple(self, sql: str, parameters: Optional[dict] = None, named: bool = False):
+		self._pre_validate(sql=sql, parameters=parameters)
+		result = self._run(
+			self._conn.query_typed_sync, sql=build_first_sql(provider=self._provider, sql=sql), parameters=parameters
+		)
+		return ParserIn(result=result).parse_first_tuple(named=named)
+
+	def query_stream(
+		self,
+		sql: str,
+		parameters: Optional[dict] = None,
+		key: str = "id",
+		batch_size: int = 1000,
+		model: Optional[MyModel] = None,
+		batch: bool = False,
+		trusted: Optional[bool] = None,
+	):
+		self._pre_validate(sql=sql, parameters=parameters)
+		check_identifier(name=key)
+		if not isinstance(batch_size, int) or batch_size <= 0:
+			raise ValueError("batch_size must be greater than 0")
+
+		last_key = None
+		while True:
+			# one row more than the page, a key repeated across the pages would skip rows.
+			stream_sql, stream_parameters = build_stream_sql(
+				provider=self._provider,
+				sql=sql,
+				key=key,
+				batch_size=batch_size + 1,
+				parameters=parameters,
+				last_key=last_key,
+			)
+			rows = self.query(sql=stream_sql, parameters=stream_parameters, model=model, trusted=trusted)
+			if not rows:
+				return
+
+			has_next = len(rows) > batch_size
+			if has_next:
+				next_key = getattr(rows[batch_size], key, None)
+				rows = rows[:batch_size]
+				last_key = getattr(rows[-1], key, None)
+				if last_key is None:
+					raise ValueError(f"the key column '{key}' must be in the query result and can not be NULL")
+				if last_key == next_key:
+					raise ValueError(
+						f"the key column '{key}' must be unique, {last_key!r} is repeated between two pages"
+					)
+
+			if batch:
+				yield rows
+			else:
+				for row in rows:
+					yield row
+
+			if not has_next:
+				return
+
 	def execute(self, sql: str, parameters: Optional[dict] = None):
 		self._pre_validate(sql=sql, parameters=parameters)
 		return self._run(self._conn.execute_sync, sql=sql, parameters=parameters)
 
+	def execute_many(self, sql: str, parameters: List[dict], batch_size: Optional[int] = None):
+		self._pre_validate(sql=sql)
+		check_many_parameters(sql=sql, parameters=parameters, batch_size=batch_size)
+		statements = build_execute_many(provider=self._provider, sql=sql, parameters=parameters, batch_size=batch_size)
+		return self._execute_batches(statements=statements)
+
+	def bulk_insert(
+		self,
+		table: str,
+		columns: List[str],
+		rows: List[Union[dict, tuple, list]],
+		batch_size: Optional[int] = None,
+	):
+		check_table(name=table)
+		check_columns(columns=columns)
+		parameters = build_rows_parameters(columns=columns, rows=rows)
+		sql = build_insert_sql(provider=self._provider, table=table, columns=columns)
+		return self.execute_many(sql=sql, parameters=parameters, batch_size=batch_size)
+
+	def bulk_upsert(
+		self,
+		table: str,
+		columns: List[str],
+		rows: List[Union[dict, tuple, list]],
+		key_columns: List[str],
+		update_columns: Optional[List[str]] = None,
+		batch_size: Optional[int] = None,
+	):
+		self._pre_validate()
+		head, row, tail = build_upsert_sql(
+			provider=self._provider,
+			table=table,
+			columns=columns,
+			key_columns=key_columns,
+			update_columns=update_columns,
+		)
+		parameters = build_upsert_parameters(columns=columns, key_columns=key_columns, rows=rows)
+		if not parameters:
+			return 0
+
+		check_many_parameters(sql=head, parameters=parameters, batch_size=batch_size)
+		statements = build_values_batches(
+			provider=self._provider, head=head, row=row, parameters=parameters, tail=tail, batch_size=batch_size
+		)
+		return self._execute_batches(statements=statements)
+
+	def bulk_update(self, table: str, rows: List[dict], key: str = "id", batch_size: Optional[int] = None):
+		self._pre_validate()
+		columns = get_rows_columns(rows=rows)
+		if not rows:
+			return 0
+
+		head, row, separator, tail = build_update_sql(provider=self._provider, table=table, columns=columns, key=key)
+		parameters = get_last_rows(parameters=rows, key_columns=[key])
+		check_many_parameters(sql=head, parameters=parameters, batch_size=batch_size)
+		statements = build_values_batches(
+			provider=self._provider,
+			head=head,
+			row=row,
+			parameters=parameters,
+			tail=tail,
+			batch_size=batch_size,
+			separator=separator,
+		)
+		return self._execute_batches(statements=statements)
+
+	def bulk_delete(self, table: str, keys: list, key: str = "id", batch_size: Optional[int] = None):
+		self._pre_validate()
+		head, row, tail = build_delete_sql(provider=self._provider, table=table, key=key)
+		if not isinstance(keys, (list, tuple)):
+			raise TypeError(parameters_type_error_message())
+
+		parameters = [{key: value} for value in keys]
+		check_many_parameters(sql=head, parameters=parameters, batch_size=batch_size)
+		statements = build_values_batches(
+			provider=self._provider, head=head, row=row, parameters=parameters, tail=tail, batch_size=batch_size
+		)
+		return self._execute_batches(statements=statements)
+
+	def _execute_batches(self, statements: List[Tuple[str, Optional[dict]]]) -> int:
+		"""
+		Execute the *statements* in a single transaction, the open transaction is used when there is one.
+		"""
+		if self._on_transaction:
+			return self._execute_all(statements=statements)
+
+		self.start_transaction()
+		try:
+			rows = self._execute_all(statements=statements)
+		except BaseException:
+			self.rollback()
+			raise
+		self.commit()
+		return rows
+
+	def _execute_all(self, statements: List[Tuple[str, Optional[dict]]]) -> int:
+		rows = 0
+		for sql, parameters in statements:
+			rows += self._run(self._conn.execute_sync, sql=sql, parameters=parameters)
+		return rows
+
+	def prepare(
+		self,
+		sql: str,
+		model: Optional[Type[MyModel]] = None,
+		param_types: Optional[Dict[str, type]] = None,
+		trusted: Optional[bool] = None,
+	) -> "PreparedQuerySync":
+		return PreparedQuerySync(engine=self, sql=sql, model=model, param_types=param_types, trusted=trusted)
+
 	def set_isolation_level(self, isolation_level: ISOLATION_LEVEL):
 		self._pre_validate(isolation_level=isolation_level)
 		try:
@@ -188,3 +433,78 @@ class PySQLXEngineSync:
 
 		if isolation_level is not None:
 			check_isolation_level(isolation_level=isolation_level)
+
+
+class PreparedQuerySync:
+	"""
+	A query validated once by `PySQLXEngineSync.prepare`, each call sends the parameters straight to the core.
+	"""
+
+	__slots__ = ["sql", "model", "param_types", "trusted", "_engine", "_first_sql", "_convert"]
+
+	def __init__(
+		self,
+		engine: PySQLXEngineSync,
+		sql: str,
+		model: Optional[Type[MyModel]] = None,
+		param_types: Optional[Dict[str, type]] = None,
+		trusted: Optional[bool] = None,
+	):
+		check_sql_and_parameters(sql=sql, parameters=None)
+		check_model(model=model)
+		check_param_types(param_types=param_types)
+
+		self.sql: str = sql
+		self.model: Optional[Type[MyModel]] = model
+		self.param_types: Optional[Dict[str, type]] = param_types
+		self.trusted: bool = engine.trusted if trusted is None else trusted
+		self._engine: PySQLXEngineSync = engine
+		self._first_sql: str = build_first_sql(provider=engine._provider, sql=sql)
+		# the row adapter is bound once, generated models are cached by the result types.
+		self._convert = None
+		if model is not None:
+			self._convert = get_constructor(model) if self.trusted else get_validator(model)
+
+	def __repr__(self) -> str:
+		return f"<{self.__class__.__name__} sql={self.sql!r}>"
+
+	def _check_columns(self, result):
+		if self.trusted:
+			check_trusted_columns(type_=self.model, columns=result.get_types())
+
+	def _check(self, parameters: Optional[dict]):
+		if not self._engine.connected:
+			raise NotConnectedError(not_connected_error_message())
+
+		if self.param_types is None:
+			check_sql_and_parameters(sql=self.sql, parameters=parameters)
+		else:
+			check_prepared_parameters(param_types=self.param_types, parameters=parameters)
+
+	def __call__(self, parameters: Optional[dict] = None):
+		return self.query(parameters=parameters)
+
+	def query(self, parameters: Optional[dict] = None):
+		self._check(parameters=parameters)
+		result = self._engine._run(self._engine._conn.query_typed_sync, sql=self.sql, parameters=parameters)
+		if self._convert is None:
+			return ParserIn(result=result, trusted=self.trusted).parse()
+		if not len(result):
+			return []
+		self._check_columns(result=result)
+		convert = self._convert
+		return [convert(row) for row in result.get_all()]
+
+	def query_first(self, parameters: Optional[dict] = None):
+		self._check(parameters=parameters)
+		result = self._engine._run(self._engine._conn.query_typed_sync, sql=self._first_sql, parameters=parameters)
+		if self._convert is None:
+			return ParserIn(result=result, trusted=self.trusted).parse_first()
+		if not len(result):
+			return None
+		self._check_columns(result=result)
+		return self._convert(result.get_first())
+
+	def execute(self, parameters: Optional[dict] = None):
+		self._check(parameters=parameters)
+		return self._engine._run(self._engine._conn.execute_sync, sql=self.sql, parameters=parameters)
@@ -27,6 +27,20 @@ TYPES_OUT = {
 	"decimal": Decimal,
 }
 
+# array.array typecodes used by the columnar results, the other types are kept in lists.
+TYPES_ARRAY = {
+	"bool": "b",
+	"int": "q",
+	"float": "d",
+}
+
+# numpy dtypes used by the optional numpy/pandas results, the other types are kept as object.
+TYPES_NUMPY = {
+	"bool": "?",
+	"int": "i8",
+	"float": "f8",
+}
+
 TYPES_IN = TYPES_OUT.copy()
 TYPES_IN.update({"array": list, "dict": dict})
 TYPES_IN.pop("json")
@@ -35,6 +49,37 @@ ISOLATION_LEVEL = Literal["ReadUncommitted", "ReadCommitted", "RepeatableRead",
 
 PROVIDER = Literal["postgresql", "mysql", "sqlserver", "sqlite"]
 
+# number of prepared statements kept by connection, the same default of the core drivers.
+STATEMENT_CACHE_SIZE = 100
+
+# rows validated between two yields to the event loop by the async chunked parse.
+PARSE_CHUNK_SIZE = 1000
+
+# parameters accepted by a single statement of each provider, sqlserver keeps two for the sp_executesql call.
+MAX_PARAMETERS = {
+	"postgresql": 65535,
+	"mysql": 65535,
+	"sqlserver": 2098,
+	"sqlite": 32766,
+}
+
+# rows accepted by a single VALUES list of each provider.
+MAX_VALUES_ROWS = {
+	"sqlserver": 1000,
+}
+
+# quotes of the table and column names written by the bulk writes.
+IDENTIFIER_QUOTES = {
+	"postgresql": ('"', '"'),
+	"mysql": ("`", "`"),
+	"sqlserver": ("[", "]"),
+	"sqlite": ('"', '"'),
+}
+
+# parameters sent by statement of the batched writes, the named parameters are rewritten by the core
+# in a time that grows faster than their number, bigger statements are slower by row.
+BATCH_PARAMETERS = 256
+
 
 CODE_AlreadyConnectedError = "PYSQLX001"
 # CODE_PoolMaxConnectionsError = "PYSQLX002"
@@ -200,3 +200,58 @@ def parameters_type_error_message():
 
             ''')}
     """
+
+
+def optional_dependency_error_message(package: str, method: str):
+	return f"""
+        the package '{package}' is required to use the method '{method}', but it is not installed.
+
+        install it using the command:
+            >> pip install {package}
+    """
+
+
+def prepared_parameters_error_message(expected, got):
+	return f"""
+        the parameters do not match the param_types of the prepared query.
+
+        expected: {", ".join(sorted(expected)) or "no parameters"}
+        got: {", ".join(sorted(got)) or "no parameters"}
+    """
+
+
+def prepared_parameters_type_error_message(name: str, expected: type, got):
+	return f"""
+        the parameter '{name}' does not match the param_types of the prepared query.
+
+        expected: {expected.__name__} or None
+        got: {type(got).__name__}
+    """
+
+
+def batch_parameters_error_message(index: int, missing):
+	return f"""
+        the parameter set {index} does not have all the parameters of the sql.
+
+        missing: {", ".join(sorted(missing))}
+    """
+
+
+def bulk_row_error_message(index: int, columns, row):
+	return f"""
+        the row {index} must be a dict or a tuple/list with one value by column.
+
+        columns: {", ".join(columns)}
+        got: {row!r}
+    """
+
+
+def trusted_columns_error_message(model: str, missing, unknown):
+	return f"""
+        the result columns do not match the fields of the model '{model}', the trusted rows are not validated.
+
+        required fields not in the result: {", ".join(sorted(missing)) or "none"}
+        result columns not in the model: {", ".join(sorted(unknown)) or "none"}
+
+        select the columns of the model or use trusted=False.
+    """
@@ -1,13 +1,15 @@
 import json
+import sys
 from datetime import date, datetime, time
 from decimal import Decimal
 from enum import Enum
-from functools import lru_cache
-from typing import Any, Callable, Dict, List, Tuple, Type, Union
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Tuple, Type, Union
 from uuid import UUID
 
 from pysqlx_engine._core.json_econder import PySQLXJsonEnconder
 
+from .cache import LRUCache
 from .const import PROVIDER
 from .errors import ParameterInvalidProviderError, ParameterInvalidValueError
 
@@ -29,20 +31,103 @@ SupportedValueType = Union[
 ]
 
 
-@lru_cache(maxsize=None)
+class LiteralCache(LRUCache):
+	"""
+	A bounded LRU cache of the sql literals rendered by the `try_*` converters.
+
+	The least recently used literals are evicted above *maxsize* entries or *maxbytes* bytes,
+	the values longer than *max_value_size* are rendered without being cached.
+	"""
+
+	__slots__ = ("maxbytes", "max_value_size", "bytes", "skipped")
+
+	def __init__(self, maxsize: int = 4096, maxbytes: int = 8 * 1024 * 1024, max_value_size: int = 4096):
+		super().__init__(maxsize=maxsize)
+		self.maxbytes = maxbytes
+		self.max_value_size = max_value_size
+		self.bytes = 0
+		self.skipped = 0
+
+	def render(self, func: Callable, provider: PROVIDER, value: Any, field: str = "") -> Any:
+		if isinstance(value, (str, bytes, tuple)) and len(value) > self.max_value_size:
+			self._skip()
+			return func(provider, value, field)
+
+		# equal values of different types are rendered differently, e.g. (1,) and (True,)
+		if isinstance(value, tuple):
+			key = (func, provider, value, tuple(type(v) for v in value))
+		else:
+			key = (func, provider, type(value), value)
+
+		try:
+			cached = self.get(key)
+		except TypeError:  # unhashable value, e.g. a tuple of dicts
+			self._skip()
+			return func(provider, value, field)
+		if cached is not None:
+			return cached[0]
+
+		result = func(provider, value, field)
+		return self.set(key, (result, sys.getsizeof(value) + sys.getsizeof(result)))[0]
+
+	def _skip(self) -> None:
+		with self._lock:
+			self.skipped += 1
+
+	def set(self, key: Hashable, value: Tuple[Any, int]) -> Tuple[Any, int]:
+		"""
+		Store the rendered literal and its size, evicting the least recently used literals above the budgets.
+		"""
+		with self._lock:
+			if key in self._data:
+				self._data.move_to_end(key)
+				return self._data[key]
+
+			self._data[key] = value
+			self.bytes += value[1]
+			while self._data and (len(self._data) > self.maxsize or self.bytes > self.maxbytes):
+				_, (_, size) = self._data.popitem(last=False)
+				self.bytes -= size
+				self.evictions += 1
+			return value
+
+	def clear(self) -> None:
+		super().clear()
+		with self._lock:
+			self.bytes = self.skipped = 0
+
+
+LITERAL_CACHE = LiteralCache()
+"""
+Cache of the sql literals rendered for the parameters, shared by the converters.
+
+Set `LITERAL_CACHE.maxsize`, `maxbytes` and `max_value_size` to change the budgets.
+`LITERAL_CACHE.info()` returns the hits, misses, evictions and size, it does not have the memory used
+and the values not cached, they are in `LITERAL_CACHE.bytes` and `LITERAL_CACHE.skipped`.
+"""
+
+
+def cached_literal(func: Callable) -> Callable:
+	@wraps(func)
+	def wrapper(provider: PROVIDER, value: Any, field: str = "") -> Any:
+		return LITERAL_CACHE.render(func, provider, value, field)
+
+	return wrapper
+
+
+@cached_literal
 def try_bool(provider: PROVIDER, value: bool, _f: str = "") -> str:
 	if provider.startswith("sqlserver") or provider.startswith("mysql"):
 		return "1" if value else "0"
 	return str(value).upper()
 
 
-@lru_cache(maxsize=None)
+@cached_literal
 def try_str(provider: PROVIDER, value: str, _f: str = "") -> str:
 	value = value.replace("'", "''")
 	return f"'{value}'"
 
 
-@lru_cache(maxsize=None)
 def try_int(_p: PROVIDER, value: int, _f: str = "") -> int:
 	return value
 
@@ -52,34 +137,31 @@ def try_json(provider: PROVIDER, value: Union[Dict[str, Any], List[Dict[str, Any
 	return f"'{data}'"
 
 
-@lru_cache(maxsize=None)
+@cached_literal
 def try_uuid(_a: PROVIDER, value: UUID, _f: str = "") -> str:
 	return f"'{value}'"
 
 
-@lru_cache(maxsize=None)
 def try_time(_p: PROVIDER, value: time, _f: str = "") -> str:
 	return f"'{value}'"
 
 
-@lru_cache(maxsize=None)
+@cached_literal
 def try_date(_p: PROVIDER, value: date, _f: str = "") -> str:
 	return f"'{value}'"
 
 
-@lru_cache(maxsize=None)
 def try_datetime(provider: PROVIDER, value: datetime, _f: str = "") -> str:
 	if provider == "sqlserver":
 		return f"'{value.isoformat(timespec='milliseconds').split('+')[0]}'"
 	return f"'{value}'"
 
 
-@lru_cache(maxsize=None)
 def try_float(_p: PROVIDER, value: float, _f: str = "") -> float:
 	return value
 
 
-@lru_cache(maxsize=None)
+@cached_literal
 def try_bytes(provider: PROVIDER, value: bytes, field: str = "") -> str:
 	if provider == "sqlserver":
 		return f"0x{value.hex()}"
@@ -94,12 +176,11 @@ def try_bytes(provider: PROVIDER, value: bytes, field: str = "") -> str:
 	return f"x'{value.hex()}'"
 
 
-@lru_cache(maxsize=None)
 def try_decimal(_p: PROVIDER, value: Decimal, _f: str = "") -> str:
 	return f"'{str(value)}'"
 
 
-@lru_cache(maxsize=None)
+@cached_literal
 def try_enum(provider: PROVIDER, value: Enum, field: str = "") -> str:
 	new_value = value.value
 	func = get_method(typ=type(new_value))
@@ -128,7 +209,7 @@ def try_tuple_enum(provider: PROVIDER, values: List[Enum], field: str = "") -> s
 	return "'{" + data + "}'"
 
 
-@lru_cache(maxsize=None)
+@cached_literal
 def try_tuple(provider: PROVIDER, values: Tuple[Any], field: str = "") -> str:
 	types = set([type(v) for v in values])
 	if len(values) > 0:
@@ -1,18 +1,30 @@
+import asyncio
+import importlib
+from array import array
+from collections import namedtuple
+from concurrent.futures import Executor
 from datetime import date, datetime, time
 from decimal import Decimal
-from typing import Any, Dict, List, Sequence, TypeVar, Union
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union, overload
 from uuid import UUID
 
 from pydantic import BaseModel, create_model
 from pysqlx_core import PySQLxResponse
 
-from .const import TYPES_OUT
-from .util import build_sql, parse_obj_as
+from .cache import LRUCache
+from .const import PARSE_CHUNK_SIZE, TYPES_ARRAY, TYPES_NUMPY, TYPES_OUT
+from .helper import optional_dependency_error_message
+from .util import build_sql, check_trusted_columns, get_constructor, get_validator, parse_obj_as
 
 MyModel = TypeVar("MyModel", bound=BaseModel)
 SupportedTypes = Union[bool, str, int, UUID, time, date, datetime, float, bytes, Decimal, None]
 JsonParam = Union[Dict[str, SupportedTypes], List[Dict[str, SupportedTypes]]]
 DictParam = Dict[str, SupportedTypes]
+TypesSignature = Tuple[Tuple[str, str], ...]
+Columns = Tuple[str, ...]
+ColumnValues = Union[array, List[SupportedTypes]]
 
 
 class BaseRow(BaseModel):
@@ -28,38 +40,237 @@ class BaseRow(BaseModel):
 		return super().__repr__()
 
 
+MODEL_CACHE = LRUCache(maxsize=256)
+"""
+Cache of the `BaseRow` models generated by `ParserIn.create_model`, keyed by the column-type signature.
+
+Use `MODEL_CACHE.info()` to get the hit, miss and eviction counters.
+"""
+
+
+def get_types_signature(types: Dict[str, str]) -> TypesSignature:
+	"""
+	Return a hashable signature of the column types.
+
+	The core does not keep the column order in `get_types()`, so the columns are sorted by name.
+	"""
+	return tuple(sorted(types.items()))
+
+
+def _build_model(signature: TypesSignature) -> Type[BaseRow]:
+	fields = {}
+	for key, value in signature:
+		if value.startswith("array_"):
+			_, v = value.split("_")
+			type_ = TYPES_OUT.get(v, Any)
+			fields[key] = (Union[Sequence[type_], None], None)
+		else:
+			type_ = TYPES_OUT.get(value, Any)
+			fields[key] = (Union[type_, None], None)
+
+	return create_model("BaseRow", **fields, __base__=BaseRow)
+
+
+NAMEDTUPLE_CACHE = LRUCache(maxsize=256)
+"""
+Cache of the namedtuple classes generated by `ParserIn.parse_tuples`, keyed by the columns.
+"""
+
+
+def _row_getter(columns: Columns) -> Callable[[dict], tuple]:
+	if len(columns) == 1:
+		(column,) = columns
+		return lambda row: (row[column],)
+	return itemgetter(*columns)
+
+
+def get_namedtuple(columns: Columns) -> Type[tuple]:
+	# rename=True, columns like "?column?" or "1" are not valid field names, they become _0, _1, ...
+	return NAMEDTUPLE_CACHE.get_or_set(columns, lambda: namedtuple("Row", columns, rename=True))
+
+
+class LazyRows(Sequence[MyModel]):
+	"""
+	A sequence of rows that builds each model only when the row is accessed.
+
+	The rows are kept as returned by the core and converted on index, slice or iteration,
+	the converted rows are cached, so each row is validated at most once.
+	"""
+
+	__slots__ = ("_rows", "_cache", "_convert")
+
+	def __init__(self, rows: List[dict], model: Type[MyModel], trusted: bool = False):
+		self._rows: List[dict] = rows
+		self._cache: List[Optional[MyModel]] = [None] * len(rows)
+		self._convert: Callable[[dict], MyModel] = get_constructor(model) if trusted else get_validator(model)
+
+	def __len__(self) -> int:
+		return len(self._rows)
+
+	def _get(self, index: int) -> MyModel:
+		row = self._cache[index]
+		if row is None:
+			row = self._cache[index] = self._convert(self._rows[index])
+		return row
+
+	@overload
+	def __getitem__(self, index: int) -> MyModel: ...
+	@overload
+	def __getitem__(self, index: slice) -> List[MyModel]: ...
+	def __getitem__(self, index: Union[int, slice]) -> Union[MyModel, List[MyModel]]:
+		if isinstance(index, slice):
+			return [self._get(i) for i in range(*index.indices(len(self._rows)))]
+		if index < 0:
+			index += len(self._rows)
+		if not 0 <= index < len(self._rows):
+			raise IndexError("LazyRows index out of range")
+		return self._get(index)
+
+	def __iter__(self) -> Iterator[MyModel]:
+		for index in range(len(self._rows)):
+			yield self._get(index)
+
+	def __eq__(self, other: object) -> bool:
+		if isinstance(other, (LazyRows, list)):
+			return list(self) == list(other)
+		return NotImplemented
+
+	def __repr__(self) -> str:
+		loaded = sum(row is not None for row in self._cache)
+		return f"<LazyRows rows={len(self._rows)} loaded={loaded}>"
+
+
+def import_optional(package: str, method: str):
+	try:
+		return importlib.import_module(package)
+	except ImportError as err:
+		raise ImportError(optional_dependency_error_message(package=package, method=method)) from err
+
+
 class ParserIn:
-	__slots__ = ("result", "model")
+	__slots__ = ("result", "model", "trusted")
 
-	def __init__(self, result: PySQLxResponse, model: MyModel = None):
+	def __init__(self, result: PySQLxResponse, model: MyModel = None, trusted: bool = False):
 		self.result: PySQLxResponse = result
 		self.model: MyModel = model
+		# trusted rows are built without validation, the values are kept as typed by the core.
+		self.trusted: bool = trusted
 
 	def create_model(self) -> BaseRow:
-		fields = {}
-		for key, value in self.result.get_types().items():
-			if value.startswith("array_"):
-				_, v = value.split("_")
-				type_ = TYPES_OUT.get(v, Any)
-				fields[key] = (Union[Sequence[type_], None], None)
-			else:
-				type_ = TYPES_OUT.get(value, Any)
-				fields[key] = (Union[type_, None], None)
+		signature = get_types_signature(self.result.get_types())
+		return MODEL_CACHE.get_or_set(signature, lambda: _build_model(signature))
 
-		model = create_model("BaseRow", **fields, __base__=BaseRow)
-		return model
+	def get_model(self) -> Type[BaseRow]:
+		"""
+		Return the model of the rows, the columns of a trusted result are checked against the given model.
+		"""
+		if self.model is None:
+			return self.create_model()
+		if self.trusted:
+			check_trusted_columns(type_=self.model, columns=self.result.get_types())
+		return self.model
 
 	def parse(self) -> List[BaseRow]:
 		if len(self.result) == 0:
 			return []
-		model = self.model or self.create_model()
-		return parse_obj_as(type_=List[model], obj=self.result.get_all())
+		model = self.get_model()
+		return parse_obj_as(type_=model, obj=self.result.get_all(), many=True, trusted=self.trusted)
+
+	async def aparse(self, chunk_size: int = PARSE_CHUNK_SIZE, executor: Optional[Executor] = None) -> List[BaseRow]:
+		"""
+		Validate the rows in chunks of *chunk_size*, yielding to the event loop between them.
+
+		With an *executor*, the chunks are validated in its threads.
+		"""
+		if len(self.result) == 0:
+			return []
+		model = self.get_model()
+		rows = self.result.get_all()
+		loop = asyncio.get_running_loop()
+		parsed = []
+		for start in range(0, len(rows), chunk_size):
+			chunk = rows[start : start + chunk_size]
+			if executor is None:
+				parsed.extend(parse_obj_as(type_=model, obj=chunk, many=True, trusted=self.trusted))
+				await asyncio.sleep(0)
+			else:
+				parse = partial(parse_obj_as, type_=model, obj=chunk, many=True, trusted=self.trusted)
+				parsed.extend(await loop.run_in_executor(executor, parse))
+		return parsed
+
+	def parse_lazy(self) -> LazyRows:
+		if len(self.result) == 0:
+			return LazyRows(rows=[], model=self.model or BaseRow)
+		model = self.get_model()
+		return LazyRows(rows=self.result.get_all(), model=model, trusted=self.trusted)
 
 	def parse_first(self) -> Union[BaseRow, None]:
 		if len(self.result) == 0:
 			return None
-		model = self.model or self.create_model()
-		return parse_obj_as(type_=model, obj=self.result.get_first())
+		model = self.get_model()
+		return parse_obj_as(type_=model, obj=self.result.get_first(), trusted=self.trusted)
+
+	def columns(self) -> Columns:
+		"""
+		Return the column names sorted by name, the core does not keep the order of the SELECT.
+		"""
+		return tuple(column for column, _ in get_types_signature(self.result.get_types()))
+
+	def parse_tuples(self, named: bool = False) -> Tuple[Columns, List[tuple]]:
+		columns = self.columns()
+		if len(self.result) == 0:
+			return columns, []
+		getter = _row_getter(columns)
+		if named:
+			make = get_namedtuple(columns)._make
+			return columns, [make(getter(row)) for row in self.result.get_all()]
+		return columns, [getter(row) for row in self.result.get_all()]
+
+	def parse_first_tuple(self, named: bool = False) -> Tuple[Columns, Optional[tuple]]:
+		columns = self.columns()
+		if len(self.result) == 0:
+			return columns, None
+		row = _row_getter(columns)(self.result.get_first())
+		return columns, get_namedtuple(columns)._make(row) if named else row
+
+	def parse_columns(self) -> Dict[str, ColumnValues]:
+		rows = self.result.get_all()
+		data = {}
+		for column, type_ in get_types_signature(self.result.get_types()):
+			values = [row[column] for row in rows]
+			typecode = TYPES_ARRAY.get(type_)
+			# array.array does not support NULL, columns with None values are kept as list.
+			if typecode is not None and None not in values:
+				try:
+					values = array(typecode, values)
+				except OverflowError:  # e.g. unsigned bigint
+					pass
+			data[column] = values
+		return data
+
+	def _numpy_columns(self, numpy) -> dict:
+		types = self.result.get_types()
+		data = {}
+		for column, values in self.parse_columns().items():
+			if isinstance(values, array):
+				# zero-copy view of the array.array buffer
+				data[column] = numpy.frombuffer(values, dtype=TYPES_NUMPY[types[column]])
+			else:
+				data[column] = numpy.fromiter(values, dtype=object, count=len(values))
+		return data
+
+	def parse_numpy(self):
+		numpy = import_optional(package="numpy", method="query_as_numpy")
+		data = self._numpy_columns(numpy)
+		result = numpy.empty(len(self.result), dtype=[(column, values.dtype) for column, values in data.items()])
+		for column, values in data.items():
+			result[column] = values
+		return result
+
+	def parse_dataframe(self):
+		pandas = import_optional(package="pandas", method="query_as_dataframe")
+		data = self._numpy_columns(import_optional(package="numpy", method="query_as_dataframe"))
+		return pandas.DataFrame(data, columns=list(data))
 
 
 class ParserSQL:
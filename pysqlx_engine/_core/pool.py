@@ -1,11 +1,13 @@
 import queue
 from contextlib import contextmanager
-from threading import Lock, Semaphore
+from threading import Event, Lock, Semaphore
 from time import monotonic
+from typing import List, Optional
 
 from pysqlx_engine import PySQLXEngineSync as PySQLXEngine
 
 from .abc.base_pool import BaseConnInfo, BaseMonitor, BasePool, Worker, logger
+from .abc.workers import PySQLXTaskSync
 from .errors import PoolAlreadyClosedError, PoolAlreadyStartedError, PoolTimeoutError
 from .util import gather, sleep, spawn
 
@@ -19,6 +21,21 @@ class ConnInfo(BaseConnInfo):
 		super()._close()
 
 
+class Waiter:
+	"""
+	A caller waiting for a connection, the connection is set before the event.
+	"""
+
+	__slots__ = ("event", "conn")
+
+	def __init__(self):
+		self.event: Event = Event()
+		self.conn: Optional[ConnInfo] = None
+
+	def done(self) -> bool:
+		return self.event.is_set()
+
+
 class Monitor(BaseMonitor):
 	pool: "PySQLXEnginePoolSync"
 
@@ -29,29 +46,40 @@ class Monitor(BaseMonitor):
 			with self.pool._monitor_lock:
 				self.pool._monitor_semaphore.acquire()
 				try:
-					conns_to_check = min(self.pool._pool.qsize(), self.pool._batch_size)
-					for _ in range(conns_to_check):
-						try:
-							conn = self.pool._pool.get_nowait()
-						except queue.Empty:
-							break
+					# the oldest connections are checked and the kept ones are put back where they are taken last
+					conns = self.pool._pool.get_oldest_nowait(self.pool._batch_size)
+					kept = []
+					trimmed = 0
+					for i, conn in enumerate(conns):
+						idle = self.pool._pool.qsize() + len(kept) + len(conns) - i - 1
 
 						if self.pool._size > self.pool._max_size:
 							logger.debug("Monitor: Pool size is above minimum, closing connection.")
 							self.pool._del_conn_unchecked(conn=conn)
 
-						elif conn.healthy is False or conn.reusable is False:
+						elif conn.reusable is False or (
+							self.pool._health_check == "periodic"
+							and not self.pool._verify(conn=conn, idle=self.pool._check_interval)
+						):
 							logger.debug(f"Connection: {conn} is unhealthy, closing.")
 							self.pool._del_conn_unchecked(conn=conn)
 
+						elif self.pool._can_trim(conn=conn, idle=idle, trimmed=trimmed):
+							logger.debug(f"Monitor: Connection {conn} is idle for too long, closing.")
+							self.pool._del_conn_unchecked(conn=conn)
+							trimmed += 1
+
 						elif monotonic() >= conn.expires_at:
 							logger.debug(f"Monitor: Connection {conn} has expired, renewing.")
 							conn.renew_expires_at()
-							self.pool._pool.put_nowait(conn)
+							kept.append(conn)
 
 						else:
 							logger.debug(f"Monitor: Reusing healthy connection {conn}.")
-							self.pool._pool.put_nowait(conn)
+							kept.append(conn)
+
+					for conn in self.pool._put_oldest_idle(kept):
+						self.pool._del_conn_unchecked(conn=conn)
 
 					if self.pool._size < self.pool._min_size:
 						logger.debug("Monitor: Pool size is below minimum, creating new connections.")
@@ -61,11 +89,15 @@ class Monitor(BaseMonitor):
 						for conn in new_conns:
 							self.pool._put_conn_unchecked(conn)
 
-					elif self.pool._growing and self.pool._size < self.pool._max_size:
-						logger.debug("Monitor: Pool is growing, creating new connections.")
-						conn = self.pool._new_conn_unchecked()
-						self.pool._put_conn_unchecked(conn)
-						self.pool._growing = False
+					idle = self.pool._pool.qsize()
+					conns_to_open = min(
+						self.pool._min_idle - idle, self.pool._max_size - self.pool._size - self.pool._connecting
+					)
+					if conns_to_open > 0:
+						logger.debug("Monitor: Idle connections are below min_idle, creating new connections.")
+						new_conns = gather(*[self.pool._new_conn_unchecked for _ in range(conns_to_open)])
+						for conn in new_conns:
+							self.pool._put_conn_unchecked(conn)
 
 				finally:
 					# Ensure that semaphore is released even if an error occurs
@@ -89,6 +121,18 @@ class PySQLXEnginePoolSync(BasePool):
 	:param keep_alive: The maximum time in seconds to keep a connection alive.
 	:param check_interval: The interval in seconds to check the pool for expired connections.
 	:param monitor_batch_size: The number of connections to check per interval.
+	:param max_concurrent_connects: The maximum number of connections opened at the same time when the pool grows.
+	:param idle_timeout: The time in seconds an idle connection is kept above min_size, None keeps it.
+	:param min_idle: The minimum number of idle connections to keep, when the max_size allows it.
+	:param max_idle: The maximum number of idle connections to keep, None is the max_size.
+	:param policy: "lifo" takes the most recently returned connection, "fifo" the least recently returned one.
+	:param health_check: When the connections are checked: "periodic" by the monitor, "never",
+		or "on_borrow_if_idle_gt=<secs>" when a connection not verified for more than secs is taken.
+	:param ping_sql: The SQL used to check a connection, e.g. "SELECT 1". None uses is_healthy, a local flag.
+	:param reset_sql: The SQL run after the rollback of a connection returned with an open transaction,
+		e.g. "RESET ALL". The connection is closed only when the reset fails.
+		"DISCARD ALL" also drops the prepared statements cached by the core,
+		use it only with "statement_cache_size=0" in the uri.
 
 	"""
 
@@ -101,6 +145,14 @@ class PySQLXEnginePoolSync(BasePool):
 		keep_alive: float = 60 * 15,
 		check_interval: float = 5.0,
 		monitor_batch_size: int = 10,  # Number of connections to check per interval
+		max_concurrent_connects: int = 5,
+		idle_timeout: Optional[float] = 60 * 10,
+		min_idle: int = 0,
+		max_idle: Optional[int] = None,
+		policy: str = "fifo",
+		health_check: str = "periodic",
+		ping_sql: Optional[str] = None,
+		reset_sql: Optional[str] = None,
 	):
 		super().__init__(
 			uri=uri,
@@ -109,8 +161,15 @@ class PySQLXEnginePoolSync(BasePool):
 			conn_timeout=conn_timeout,
 			keep_alive=keep_alive,
 			check_interval=check_interval,
+			max_concurrent_connects=max_concurrent_connects,
+			idle_timeout=idle_timeout,
+			min_idle=min_idle,
+			max_idle=max_idle,
+			policy=policy,
+			health_check=health_check,
+			ping_sql=ping_sql,
+			reset_sql=reset_sql,
 		)
-		self._pool: queue.Queue[ConnInfo] = queue.Queue(maxsize=self._max_size)
 		self._semaphore: Semaphore = Semaphore(self._max_size)
 		self._monitor_lock: Lock = Lock()
 		self._monitor_semaphore: Semaphore = Semaphore(1)
@@ -120,12 +179,18 @@ class PySQLXEnginePoolSync(BasePool):
 		self._monitor = None
 		self._batch_size = monitor_batch_size
 		self._lock = Lock()
+		self._waiters_lock = Lock()
+		self._growers: List[PySQLXTaskSync] = []
 
 	def _new_conn_unchecked(self) -> ConnInfo:
 		conn = PySQLXEngine(uri=self.uri)
-		conn.connect()
+		try:
+			conn.connect()
+		except Exception:
+			self._record_failed()
+			raise
 		conn_info = ConnInfo(conn=conn, keep_alive=self._keep_alive)
-		self._size += 1
+		self._record_created(conn_info)
 		logger.debug(f"Pool: New connection created: {conn_info} PoolSize: {self._size}")
 		return conn_info
 
@@ -133,39 +198,137 @@ class PySQLXEnginePoolSync(BasePool):
 		if use_lock:
 			with self._lock:
 				conn.close()
-				self._size -= 1
 		else:
 			conn.close()
-			self._size -= 1
+		self._record_closed(conn)
 		logger.debug(f"Pool: Connection closed: {conn} PoolSize: {self._size}")
 
 	def _put_conn_unchecked(self, conn: ConnInfo) -> None:
-		if conn.healthy and conn.reusable and self._size <= self._max_size:
-			try:
-				self._pool.put(conn, timeout=1)
+		if conn.reusable and self._size <= self._max_size:
+			if self._put_idle(conn):
 				logger.debug(f"Pool: Connection returned to pool: {conn}")
-			except queue.Full:
+			else:
 				logger.debug(f"Pool: Pool is full. Closing connection: {conn}")
 				self._del_conn_unchecked(conn)
 		else:
 			logger.debug(f"Pool: Connection is not reusable or expired: {conn}")
 			self._del_conn_unchecked(conn)
 
-	def _get_ready_conn(self) -> BaseConnInfo:
+	def _put_idle(self, conn: ConnInfo) -> bool:
+		"""
+		Hand the connection to the oldest waiter, or keep it idle when nobody is waiting.
+
+		Returns False when the pool is full.
+		"""
+		with self._waiters_lock:
+			if self._hand_over(conn):
+				return True
+			try:
+				self._pool.put_nowait(conn)
+				return True
+			except queue.Full:
+				return False
+
+	def _put_oldest_idle(self, conns: List[ConnInfo]) -> List[ConnInfo]:
+		"""
+		Hand the connections checked by the monitor to the waiters, or put them back with the oldest ones.
+
+		Returns the connections that do not fit.
+		"""
+		with self._waiters_lock:
+			conns = [conn for conn in conns if not self._hand_over(conn)]
+			return self._pool.put_oldest_nowait(conns)
+
+	def _hand_over(self, conn: ConnInfo) -> bool:
+		# must be called with the waiters lock held
+		if self._waiters:
+			waiter: Waiter = self._waiters.popleft()
+			waiter.conn = conn
+			waiter.event.set()
+			return True
+		return False
+
+	def _reset(self, conn: ConnInfo) -> bool:
+		"""
+		Roll back the transaction left open on *conn* and run the reset_sql, False when it fails.
+		"""
+		logger.warning("Transaction is still active, please commit or rollback before returning the connection.")
 		try:
-			conn = self._pool.get(timeout=BaseConnInfo._jitter(value=0.3))
-			return conn
-		except queue.Empty:
-			return
+			conn.conn.rollback()
+			if self._reset_sql is not None:
+				conn.conn.raw_cmd(sql=self._reset_sql)
+			return True
+		except Exception as e:
+			logger.error(f"Pool: Error resetting the connection {conn}, closing it: {e}")
+			return False
 
-	def _check_grow(self, value: int) -> None:
-		with self._lock:
-			self._waiting += value
-			if self._size >= self._max_size:
-				return
+	def _verify(self, conn: ConnInfo, idle: float) -> bool:
+		"""
+		Check *conn* if it was not verified in the last *idle* seconds, False when it is broken.
+		"""
+		if monotonic() - conn.last_verified <= idle:
+			return True
+
+		if self._ping_sql is None:
+			healthy = conn.healthy
+		else:
+			try:
+				conn.conn.raw_cmd(sql=self._ping_sql)
+				healthy = True
+			except Exception as e:
+				logger.debug(f"Pool: Ping failed on connection {conn}: {e}")
+				healthy = False
 
-			self._growing = self._waiting > 1
-			logger.debug(f"Pool: Growing: {self._growing} Waiting: {self._waiting}")
+		if healthy:
+			conn.last_verified = monotonic()
+		return healthy
+
+	def _get_ready_conn(self, timeout: float) -> Optional[ConnInfo]:
+		"""
+		Return an idle connection or wait in line until one is returned, None on timeout.
+		"""
+		with self._waiters_lock:
+			try:
+				return self._pool.get_nowait()
+			except queue.Empty:
+				waiter = Waiter()
+				self._waiters.append(waiter)
+				conns = self._conns_to_grow(waiting=len(self._waiters))
+				self._connecting += conns
+
+		if conns > 0:
+			self._grow(conns=conns)
+
+		waiter.event.wait(timeout=max(timeout, 0.0))
+		with self._waiters_lock:
+			if waiter.conn is None and not waiter.event.is_set():
+				self._waiters.remove(waiter)
+		return waiter.conn
+
+	def _grow(self, conns: int) -> None:
+		"""
+		Open connections in parallel for the callers waiting without an idle connection.
+		"""
+		logger.debug(f"Pool: Growing {conns} connections, Waiting: {len(self._waiters)} PoolSize: {self._size}")
+		grower = spawn(gather, args=tuple(self._grow_conn for _ in range(conns)), name="PoolGrower")
+		with self._waiters_lock:
+			self._growers = [grower for grower in self._growers if grower.is_alive()]
+			self._growers.append(grower)
+
+	def _grow_conn(self) -> None:
+		try:
+			conn = self._new_conn_unchecked()
+		except Exception as e:
+			logger.error(f"Pool: Error opening a new connection: {e}")
+			return
+		finally:
+			with self._waiters_lock:
+				self._connecting -= 1
+
+		if self.closed:
+			self._del_conn_unchecked(conn)
+		else:
+			self._put_conn_unchecked(conn)
 
 	def _get_conn(self) -> ConnInfo:
 		self._check_closed()
@@ -180,26 +343,33 @@ class PySQLXEnginePoolSync(BasePool):
 			deadline -= monotonic() - start  # Adjust deadline for time spent waiting for semaphore
 			logger.debug(f"Acquired semaphore in {monotonic() - start:.5f} seconds")
 		except Exception as e:
-			raise PoolTimeoutError("Timeout waiting for a connection semaphore") from e
+			raise self._timeout_error("Timeout waiting for a connection semaphore") from e
 
 		try:
-			self._check_grow(1)
 			while True:
 				timeout = deadline - monotonic()
 				if timeout < 0.0:
-					raise PoolTimeoutError("Timeout waiting for a connection")
+					raise self._timeout_error("Timeout waiting for a connection")
 
-				conn = self._get_ready_conn()
-				if conn:
-					logger.debug(f"Pool: Connection: {conn} retrieved in {monotonic() - start_time:.5f} seconds.")
-					return conn
+				conn = self._get_ready_conn(timeout=timeout)
+				if conn is None:
+					self._check_closed()
+					raise self._timeout_error("Timeout waiting for a connection")
 
-				sleep(BaseConnInfo._jitter(value=0.3))
+				if self._health_check != "on_borrow" or self._verify(conn=conn, idle=self._health_check_idle):
+					break
+
+				logger.debug(f"Pool: Connection {conn} failed the health check, closing.")
+				self._del_conn_unchecked(conn)
+
+			self._record_acquire(conn, start_time=start_time)
+			logger.debug(f"Pool: Connection: {conn} retrieved in {monotonic() - start_time:.5f} seconds.")
+			return conn
 		finally:
-			self._check_grow(-1)
 			self._semaphore.release()
 
 	def _put_conn(self, conn: ConnInfo) -> None:
+		self._record_release(conn)
 		try:
 			with self._lock:
 				self._put_conn_unchecked(conn)
@@ -218,7 +388,7 @@ class PySQLXEnginePoolSync(BasePool):
 			try:
 				conns = gather(*tasks)
 				for conn in conns:
-					self._pool.put(conn)
+					self._pool.put_nowait(conn)
 			except Exception as e:
 				logger.error(f"Pool: Error during pool initialization: {e}")
 				raise
@@ -251,9 +421,12 @@ class PySQLXEnginePoolSync(BasePool):
 		except Exception as e:
 			logger.error(f"Pool: Error during connection usage: {e}")
 			raise
+		else:
+			# the connection worked, it is not pinged until it is idle again
+			conn.last_verified = monotonic()
 		finally:
-			if conn.conn._on_transaction:
-				logger.warning("Transaction is still active, please commit or rollback before closing the connection.")
+			if conn.conn._on_transaction and not self._reset(conn):
+				self._record_release(conn)
 				self._del_conn_unchecked(conn, use_lock=True)
 			else:
 				self._put_conn(conn)
@@ -265,9 +438,20 @@ class PySQLXEnginePoolSync(BasePool):
 		logger.info("Pool: Stopping the connection pool.")
 		self._opened = False
 
+		# Wake up the waiters, they raise PoolClosedError
+		with self._waiters_lock:
+			while self._waiters:
+				self._waiters.popleft().event.set()
+
+		# Wait for the connections being opened, they are closed because the pool is closed
+		with self._waiters_lock:
+			growers, self._growers = self._growers, []
+		for grower in growers:
+			grower.join(timeout=self._conn_timeout)
+
 		# Close all connections
 		while not self._pool.empty():
-			conn = self._pool.get()
+			conn = self._pool.get_nowait()
 			self._del_conn_unchecked(conn)
 
 		# Stop all workers
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+import re
 import shutil
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -9,14 +10,36 @@ from datetime import time as dt_time
 from decimal import Decimal
 from enum import Enum
 from functools import lru_cache
-from typing import Any, Callable, Coroutine, List, TypeVar, Union
+from typing import (
+	Any,
+	Callable,
+	Coroutine,
+	Dict,
+	Iterable,
+	List,
+	Optional,
+	Tuple,
+	Type,
+	TypeVar,
+	Union,
+)
 from uuid import UUID
 
 from pydantic import BaseModel
 from pysqlx_core import PySQLxError as _PySQLXError
 
 from .abc.workers import PySQLXTask, PySQLXTaskSync
-from .const import ISOLATION_LEVEL, PYDANTIC_IS_V1
+from .cache import LRUCache
+from .const import (
+	BATCH_PARAMETERS,
+	IDENTIFIER_QUOTES,
+	ISOLATION_LEVEL,
+	MAX_PARAMETERS,
+	MAX_VALUES_ROWS,
+	PROVIDER,
+	PYDANTIC_IS_V1,
+	STATEMENT_CACHE_SIZE,
+)
 from .errors import (
 	ConnectError,
 	ExecuteError,
@@ -27,14 +50,19 @@ from .errors import (
 	RawCmdError,
 	StartTransactionError,
 )
-from .helper import isolation_error_message, parameters_type_error_message, sql_type_error_message
+from .helper import (
+	batch_parameters_error_message,
+	bulk_row_error_message,
+	isolation_error_message,
+	model_parameter_error_message,
+	parameters_type_error_message,
+	prepared_parameters_error_message,
+	prepared_parameters_type_error_message,
+	sql_type_error_message,
+	trusted_columns_error_message,
+)
 from .param_converter import convert
 
-if PYDANTIC_IS_V1:
-	from pydantic import parse_obj_as as _parse_obj_as  # pragma: no cover
-else:
-	from pydantic import TypeAdapter  # pragma: no cover
-
 
 def pysqlx_get_error(err: _PySQLXError) -> PySQLXError:
 	types_err = {
@@ -53,20 +81,56 @@ def pysqlx_get_error(err: _PySQLXError) -> PySQLXError:
 	return err
 
 
+PARAMETER_TYPES = (bool, str, int, list, dict, tuple, UUID, dt_time, date, datetime, float, bytes, Decimal, Enum)
+
+
 def check_sql_and_parameters(sql: str, parameters: dict):
 	if not isinstance(sql, str):
 		raise TypeError(sql_type_error_message())
 
 	if parameters is not None:
-		_types = (bool, str, int, list, dict, tuple, UUID, dt_time, date, datetime, float, bytes, Decimal, Enum)
 		if (
 			not isinstance(parameters, dict)
 			or not all([isinstance(key, str) for key in parameters.keys()])
-			or not all([isinstance(value, _types) or value is None for value in parameters.values()])
+			or not all([isinstance(value, PARAMETER_TYPES) or value is None for value in parameters.values()])
 		):
 			raise TypeError(parameters_type_error_message())
 
 
+def check_model(model: Optional[Type[BaseModel]]):
+	if model is not None and not (isinstance(model, type) and issubclass(model, BaseModel)):
+		raise TypeError(model_parameter_error_message())
+
+
+def check_param_types(param_types: Optional[Dict[str, type]]):
+	if param_types is None:
+		return
+	if (
+		not isinstance(param_types, dict)
+		or not all([isinstance(key, str) for key in param_types.keys()])
+		or not all([isinstance(typ, type) and issubclass(typ, PARAMETER_TYPES) for typ in param_types.values()])
+	):
+		raise TypeError(parameters_type_error_message())
+
+
+def check_prepared_parameters(param_types: Dict[str, type], parameters: Optional[dict]):
+	"""
+	Check the parameter names and that each value is an instance of its declared type or None.
+
+	A bool is an int for isinstance, it is accepted only by the parameters declared as bool.
+	"""
+	parameters = parameters or {}
+	if set(parameters) != set(param_types):
+		raise TypeError(prepared_parameters_error_message(expected=param_types.keys(), got=parameters.keys()))
+
+	for name, value in parameters.items():
+		expected = param_types[name]
+		if value is None:
+			continue
+		if not isinstance(value, expected) or (isinstance(value, bool) and expected is not bool):
+			raise TypeError(prepared_parameters_type_error_message(name=name, expected=expected, got=value))
+
+
 @lru_cache(maxsize=None)
 def check_isolation_level(isolation_level: ISOLATION_LEVEL):
 	levels = [
@@ -81,19 +145,204 @@ def check_isolation_level(isolation_level: ISOLATION_LEVEL):
 
 
 def build_sql(provider: str, sql: str, parameters: dict = None) -> str:
-	new_sql = sql
-	if parameters is not None:
-		load_parameter = {key: convert(provider=provider, value=value, field=key) for key, value in parameters.items()}
+	if not parameters:
+		return sql
+	return compile_sql(sql).render(provider=provider, parameters=parameters)
+
+
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+TABLE_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+STREAM_LAST_KEY = "pysqlx_last_key"
+
+
+def check_identifier(name: str, field: str = "key") -> None:
+	"""
+	Check that *name* is a plain column or table name.
+	"""
+	if not isinstance(name, str) or not IDENTIFIER_RE.match(name):
+		raise ValueError(f"invalid {field}: {name!r}, must be a column name with only letters, digits and '_'")
+
+
+def check_table(name: str) -> None:
+	"""
+	Check that *name* is a plain table name, optionally with the schema.
+	"""
+	if not isinstance(name, str) or not TABLE_RE.match(name):
+		raise ValueError(f"invalid table: {name!r}, must be a table name with only letters, digits, '_' and the schema")
+
+
+def quote_identifier(provider: PROVIDER, name: str) -> str:
+	"""
+	Quote a checked column or table name, each part of a `schema.table` name is quoted.
+	"""
+	start, end = IDENTIFIER_QUOTES[provider]
+	return ".".join([f"{start}{part}{end}" for part in name.split(".")])
+
+
+def check_columns(columns: List[str], field: str = "columns") -> None:
+	if not isinstance(columns, (list, tuple)) or not columns:
+		raise ValueError(f"invalid {field}: {columns!r}, must be a non empty list of column names")
+	for column in columns:
+		check_identifier(name=column, field="column")
+	if len(set(columns)) != len(columns):
+		raise ValueError(f"invalid {field}: {columns!r}, the column names must be unique")
+
+
+def build_stream_sql(
+	provider: PROVIDER, sql: str, key: str, batch_size: int, parameters: Optional[dict] = None, last_key: Any = None
+) -> Tuple[str, Optional[dict]]:
+	"""
+	Wrap *sql* in a keyset page: the next *batch_size* rows ordered by *key* after *last_key*.
+
+	The first page is requested with *last_key* None.
+	"""
+	sql = sql.strip().rstrip(";")
+	where = ""
+	if last_key is not None:
+		where = f" WHERE {key} > :{STREAM_LAST_KEY}"
+		parameters = {**(parameters or {}), STREAM_LAST_KEY: last_key}
+
+	if provider == "sqlserver":
+		stream_sql = f"SELECT TOP ({batch_size}) * FROM ({sql}) AS pysqlx_stream{where} ORDER BY {key}"
+	else:
+		stream_sql = f"SELECT * FROM ({sql}) AS pysqlx_stream{where} ORDER BY {key} LIMIT {batch_size}"
+	return stream_sql, parameters
+
+
+STATEMENT_CACHE_URI_RE = re.compile(r"([?&])statement_cache_size=(\d*)")
+
+
+def build_statement_cache_uri(provider: PROVIDER, uri: str, size: Optional[int] = None) -> Tuple[str, int]:
+	"""
+	Return the uri with the `statement_cache_size` used by the core and the cache size.
+
+	The core keeps the prepared statements by connection on PostgreSQL and MySQL, the size is set by the uri.
+	When *size* is None, the value of the uri or the default is kept.
+	"""
+	match = STATEMENT_CACHE_URI_RE.search(uri)
+	if size is not None and (not isinstance(size, int) or size < 0):
+		raise ValueError("statement_cache_size must be greater than or equal to 0")
+
+	if provider not in ("postgresql", "mysql"):
+		# the core does not keep prepared statements on SQLite and Microsoft SQL Server.
+		return uri, 0
+
+	if size is None:
+		return uri, int(match.group(2)) if match and match.group(2) else STATEMENT_CACHE_SIZE
+
+	if match:
+		return STATEMENT_CACHE_URI_RE.sub(rf"\g<1>statement_cache_size={size}", uri, count=1), size
+	return f"{uri}{'&' if '?' in uri else '?'}statement_cache_size={size}", size
+
+
+# statements where a row limit can not be added safely, they are sent unchanged.
+FIRST_ROW_SKIP_RE = re.compile(r"\b(LIMIT|TOP|FETCH|OFFSET|FOR|INTO|LOCK)\b|;", re.IGNORECASE)
+FIRST_ROW_SKIP_SQLSERVER_RE = re.compile(r"\b(UNION|INTERSECT|EXCEPT)\b", re.IGNORECASE)
+FIRST_ROW_SELECT_RE = re.compile(r"^(SELECT|WITH)\b", re.IGNORECASE)
+FIRST_ROW_SELECT_SQLSERVER_RE = re.compile(r"^SELECT(\s+(DISTINCT|ALL))?\b", re.IGNORECASE)
+# the quoted text and the comments are matched to be skipped, the parentheses track the depth of the CTEs.
+FIRST_ROW_STATEMENT_RE = re.compile(
+	r"""
+	'(?:[^']|'')*'
+	|"(?:[^"]|"")*"
+	|`[^`]*`
+	|--[^\n]*
+	|/\*.*?\*/
+	|(\()
+	|(\))
+	|\b(SELECT|INSERT|UPDATE|DELETE|MERGE)\b
+	""",
+	re.IGNORECASE | re.VERBOSE | re.DOTALL,
+)
+
+
+def get_statement_type(sql: str) -> str:
+	"""
+	Return the top level statement of *sql* in upper case, the statement after the CTEs of a WITH.
+	"""
+	depth = 0
+	for match in FIRST_ROW_STATEMENT_RE.finditer(sql):
+		if match.group(1):
+			depth += 1
+		elif match.group(2):
+			depth -= 1
+		elif match.group(3) and depth == 0:
+			return match.group(3).upper()
+	return ""
+
+
+def build_first_sql(provider: PROVIDER, sql: str) -> str:
+	"""
+	Limit a plain SELECT to one row, so the database sends only the first row.
+
+	`LIMIT 1` is added on PostgreSQL, MySQL and SQLite and `TOP (1)` on Microsoft SQL Server.
+	Any statement that already limits the rows, locks, creates or may change meaning is returned unchanged.
+	"""
+	new_sql = sql.strip().rstrip(";").rstrip()
+	if FIRST_ROW_SKIP_RE.search(new_sql):
+		return sql
+
+	if provider == "sqlserver":
+		match = FIRST_ROW_SELECT_SQLSERVER_RE.match(new_sql)
+		if match is None or FIRST_ROW_SKIP_SQLSERVER_RE.search(new_sql):
+			return sql
+		return f"{match.group(0)} TOP (1){new_sql[match.end() :]}"
+
+	# a WITH may be followed by an UPDATE, DELETE or INSERT, only the SELECT is limited.
+	if FIRST_ROW_SELECT_RE.match(new_sql) is None or get_statement_type(new_sql) != "SELECT":
+		return sql
+	# new line, a trailing "-- comment" would hide the limit
+	return f"{new_sql}\nLIMIT 1"
+
+
+def get_validator(type_: Type[BaseModel]) -> Callable[[dict], BaseModel]:
+	"""
+	Return the validator compiled by pydantic when the model class was created.
+
+	The validator lives on the model class itself, so nothing is kept alive after the model is gone.
+	"""
+	return type_.parse_obj if PYDANTIC_IS_V1 else type_.__pydantic_validator__.validate_python
 
-		param_as_list_of_tuples = sorted(load_parameter.items(), key=lambda x: x[0], reverse=True)
 
-		for key, value in param_as_list_of_tuples:
-			new_sql = new_sql.replace(f":{key}", str(value))
-	return new_sql
+def get_constructor(type_: Type[BaseModel]) -> Callable[[dict], BaseModel]:
+	"""
+	Return a function that builds the model from a row without validation or coercion.
+	"""
+	construct = type_.construct if PYDANTIC_IS_V1 else type_.model_construct
+	return lambda row: construct(**row)
 
 
-def parse_obj_as(type_: Union[BaseModel, List[BaseModel]], obj: Union[dict, list]) -> type:
-	return _parse_obj_as(type_=type_, obj=obj) if PYDANTIC_IS_V1 else TypeAdapter(type=type_).validate_python(obj)
+def check_trusted_columns(type_: Type[BaseModel], columns: Iterable[str]) -> None:
+	"""
+	Check the result columns against the model fields once by result, the trusted rows are built without validation.
+
+	Raise ValueError when a column is not a field of the model or a required field is not in the columns.
+	"""
+	fields = type_.__fields__ if PYDANTIC_IS_V1 else type_.model_fields
+	columns = set(columns)
+	names = set()
+	missing = []
+	for name, field in fields.items():
+		alias = getattr(field, "alias", None) or name
+		names.update((name, alias))
+		required = field.required if PYDANTIC_IS_V1 else field.is_required()
+		if required and name not in columns and alias not in columns:
+			missing.append(name)
+
+	unknown = columns - names
+	if missing or unknown:
+		raise ValueError(trusted_columns_error_message(model=type_.__name__, missing=missing, unknown=unknown))
+
+
+def parse_obj_as(
+	type_: Type[BaseModel], obj: Union[dict, List[dict]], many: bool = False, trusted: bool = False
+) -> type:
+	validate = get_constructor(type_) if trusted else get_validator(type_)
+	if many:
+		return [validate(row) for row in obj]
+	return validate(obj)
 
 
 @lru_cache(maxsize=None)
@@ -135,6 +384,357 @@ def create_log_line(text: str, character: str = "=") -> str:
 T = TypeVar("T")
 
 
+# the quoted strings and identifiers, the comments and the "::" casts are matched to be skipped,
+# only the last alternative is a placeholder.
+SQL_PLACEHOLDER_RE = re.compile(
+	r"""
+	'(?:[^']|'')*'
+	|"(?:[^"]|"")*"
+	|`[^`]*`
+	|--[^\n]*
+	|/\*.*?\*/
+	|::
+	|:([A-Za-z_][A-Za-z0-9_]*)
+	""",
+	re.VERBOSE | re.DOTALL,
+)
+
+
+class SQLTemplate:
+	"""
+	A sql split on its `:name` placeholders, *parts* has one more item than *names*.
+	"""
+
+	__slots__ = ("parts", "names")
+
+	def __init__(self, parts: Tuple[str, ...], names: Tuple[str, ...]):
+		self.parts = parts
+		self.names = names
+
+	def rename(self, suffix: str) -> str:
+		"""
+		Return the sql with *suffix* appended to every placeholder name.
+		"""
+		chunks = [self.parts[0]]
+		for name, part in zip(self.names, self.parts[1:]):
+			chunks.append(f":{name}{suffix}")
+			chunks.append(part)
+		return "".join(chunks)
+
+	def render(self, provider: str, parameters: dict) -> str:
+		"""
+		Write the *parameters* as sql literals in the placeholders, the unknown names are kept as they are.
+		"""
+		values = {}
+		for name in self.names:
+			if name not in values and name in parameters:
+				values[name] = str(convert(provider=provider, value=parameters[name], field=name))
+
+		chunks = [self.parts[0]]
+		for name, part in zip(self.names, self.parts[1:]):
+			chunks.append(values.get(name, f":{name}"))
+			chunks.append(part)
+		return "".join(chunks)
+
+
+def _compile_sql(sql: str) -> SQLTemplate:
+	parts, names = [], []
+	start = 0
+	for match in SQL_PLACEHOLDER_RE.finditer(sql):
+		name = match.group(1)
+		if name is not None:
+			parts.append(sql[start : match.start()])
+			names.append(name)
+			start = match.end()
+	parts.append(sql[start:])
+	return SQLTemplate(parts=tuple(parts), names=tuple(names))
+
+
+SQL_TEMPLATE_CACHE = LRUCache(maxsize=256)
+"""
+Cache of the `SQLTemplate` compiled by `compile_sql`, keyed by the sql text.
+"""
+
+
+def compile_sql(sql: str) -> SQLTemplate:
+	"""
+	Split *sql* on its `:name` placeholders in a single pass, skipping the quoted strings, the comments and the casts.
+	"""
+	return SQL_TEMPLATE_CACHE.get_or_set(sql, lambda: _compile_sql(sql))
+
+
+def check_many_parameters(sql: str, parameters: List[dict], batch_size: Optional[int] = None):
+	if not isinstance(parameters, (list, tuple)) or not all([isinstance(params, dict) for params in parameters]):
+		raise TypeError(parameters_type_error_message())
+
+	for params in parameters:
+		check_sql_and_parameters(sql=sql, parameters=params)
+
+	if batch_size is not None and (not isinstance(batch_size, int) or batch_size <= 0):
+		raise ValueError("batch_size must be greater than 0")
+
+
+def get_batch_rows(provider: PROVIDER, columns: int, batch_size: Optional[int] = None) -> int:
+	"""
+	Rows sent by statement, *batch_size* is bounded by the parameters and VALUES rows accepted by the provider.
+	"""
+	columns = max(columns, 1)
+	limit = min(MAX_PARAMETERS[provider] // columns, MAX_VALUES_ROWS.get(provider, MAX_PARAMETERS[provider]))
+	if batch_size is None:
+		batch_size = BATCH_PARAMETERS // columns
+	return max(1, min(batch_size, limit))
+
+
+# an INSERT with a single VALUES row at the end, e.g. "INSERT INTO users (id, name) VALUES (:id, :name);"
+INSERT_VALUES_RE = re.compile(r"^\s*(INSERT\s+INTO\s+.+?\s+VALUES\s*)(\(.*\))\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+SQL_QUOTED_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`")
+
+
+def _is_single_group(sql: str) -> bool:
+	"""
+	Check that the first parenthesis of *sql* is closed only by its last char, the quoted text is ignored.
+	"""
+	sql = SQL_QUOTED_RE.sub("''", sql)
+	depth = 0
+	for index, char in enumerate(sql):
+		if char == "(":
+			depth += 1
+		elif char == ")":
+			depth -= 1
+			if depth == 0:
+				return index == len(sql) - 1
+	return False
+
+
+def build_values_batches(
+	provider: PROVIDER,
+	head: str,
+	row: str,
+	parameters: List[dict],
+	tail: str = "",
+	batch_size: Optional[int] = None,
+	separator: str = ", ",
+) -> List[Tuple[str, dict]]:
+	"""
+	Write the *parameters* as multi-row VALUES of up to *batch_size* rows between *head* and *tail*.
+
+	Each row has its own placeholders, e.g. `(:id__0, :name__0), (:id__1, :name__1)`.
+	"""
+	template = compile_sql(row)
+	names = tuple(dict.fromkeys(template.names))
+	size = get_batch_rows(provider=provider, columns=len(names), batch_size=batch_size)
+	rows = [template.rename(suffix=f"__{index}") for index in range(min(size, len(parameters)))]
+
+	statements = []
+	for start in range(0, len(parameters), size):
+		chunk = parameters[start : start + size]
+		batch = {}
+		for index, params in enumerate(chunk):
+			missing = [name for name in names if name not in params]
+			if missing:
+				raise TypeError(batch_parameters_error_message(index=start + index, missing=missing))
+			for name in names:
+				batch[f"{name}__{index}"] = params[name]
+		statements.append((head + separator.join(rows[: len(chunk)]) + tail, batch))
+	return statements
+
+
+def build_execute_many(
+	provider: PROVIDER, sql: str, parameters: List[dict], batch_size: Optional[int] = None
+) -> List[Tuple[str, Optional[dict]]]:
+	"""
+	Split the *parameters* in the statements sent to the database.
+
+	An INSERT with a single VALUES row is sent as multi-row INSERTs of up to *batch_size* rows,
+	the other sqls are sent once by parameter set.
+	"""
+	match = INSERT_VALUES_RE.match(sql)
+	if (
+		match is None
+		or not _is_single_group(match.group(2))
+		or compile_sql(match.group(1)).names
+		or not compile_sql(match.group(2)).names
+	):
+		return [(sql, params) for params in parameters]
+
+	return build_values_batches(
+		provider=provider, head=match.group(1), row=match.group(2), parameters=parameters, batch_size=batch_size
+	)
+
+
+def build_rows_parameters(columns: List[str], rows: List[Union[dict, tuple, list]]) -> List[dict]:
+	"""
+	Map each row to the parameters of *columns*, a row is a dict or a sequence in the order of the columns.
+	"""
+	if not isinstance(rows, (list, tuple)):
+		raise TypeError(parameters_type_error_message())
+
+	parameters = []
+	for index, row in enumerate(rows):
+		if isinstance(row, dict):
+			parameters.append(row)
+		elif isinstance(row, (tuple, list)) and len(row) == len(columns):
+			parameters.append(dict(zip(columns, row)))
+		else:
+			raise TypeError(bulk_row_error_message(index=index, columns=columns, row=row))
+	return parameters
+
+
+def get_last_rows(parameters: List[dict], key_columns: List[str]) -> List[dict]:
+	"""
+	Keep only the last row of each key, a statement can not insert or update the same key twice.
+
+	The keys with a NULL never conflict, their rows are all kept.
+	"""
+	rows = {}
+	for index, params in enumerate(parameters):
+		missing = [column for column in key_columns if column not in params]
+		if missing:
+			raise TypeError(batch_parameters_error_message(index=index, missing=missing))
+		key = tuple([params[column] for column in key_columns])
+		if None in key:
+			key = object()
+		rows.pop(key, None)
+		rows[key] = params
+	return list(rows.values())
+
+
+def build_upsert_parameters(
+	columns: List[str], key_columns: List[str], rows: List[Union[dict, tuple, list]]
+) -> List[dict]:
+	"""
+	Map the rows like `build_rows_parameters`, keeping only the last row of each key.
+	"""
+	return get_last_rows(parameters=build_rows_parameters(columns=columns, rows=rows), key_columns=key_columns)
+
+
+def build_insert_sql(provider: PROVIDER, table: str, columns: List[str]) -> str:
+	names = ", ".join([quote_identifier(provider, column) for column in columns])
+	placeholders = ", ".join([f":{column}" for column in columns])
+	return f"INSERT INTO {quote_identifier(provider, table)} ({names}) VALUES ({placeholders})"
+
+
+def get_rows_columns(rows: List[dict]) -> List[str]:
+	"""
+	The columns of *rows* are the keys of the first row.
+	"""
+	if not isinstance(rows, (list, tuple)) or not all([isinstance(row, dict) for row in rows]):
+		raise TypeError(parameters_type_error_message())
+	return list(rows[0]) if rows else []
+
+
+def build_upsert_sql(
+	provider: PROVIDER,
+	table: str,
+	columns: List[str],
+	key_columns: List[str],
+	update_columns: Optional[List[str]] = None,
+) -> Tuple[str, str, str]:
+	"""
+	Return the head, the VALUES row and the tail of the provider native upsert of *columns*.
+
+	The rows matching the *key_columns* update the *update_columns*, by default the columns out of the key,
+	no column is updated when *update_columns* is empty.
+	"""
+	check_table(name=table)
+	check_columns(columns=columns)
+	check_columns(columns=key_columns, field="key_columns")
+	if update_columns is None:
+		update_columns = [column for column in columns if column not in key_columns]
+	elif update_columns:
+		check_columns(columns=update_columns, field="update_columns")
+	else:
+		update_columns = []
+
+	unknown = [column for column in [*key_columns, *update_columns] if column not in columns]
+	if unknown:
+		raise ValueError(f"invalid columns: {unknown!r}, the key and update columns must be in the rows")
+
+	quoted = {column: quote_identifier(provider, column) for column in columns}
+	table = quote_identifier(provider, table)
+	names = ", ".join(quoted.values())
+	row = f"({', '.join([f':{column}' for column in columns])})"
+
+	if provider == "sqlserver":
+		# HOLDLOCK keeps the matched keys locked until the insert, two MERGE can not insert the same key.
+		head = f"MERGE INTO {table} WITH (HOLDLOCK) AS pysqlx_target USING (VALUES "
+		on = " AND ".join(
+			[f"pysqlx_target.{quoted[column]} = pysqlx_source.{quoted[column]}" for column in key_columns]
+		)
+		tail = f") AS pysqlx_source ({names}) ON {on}"
+		if update_columns:
+			sets = ", ".join([f"{quoted[column]} = pysqlx_source.{quoted[column]}" for column in update_columns])
+			tail += f" WHEN MATCHED THEN UPDATE SET {sets}"
+		values = ", ".join([f"pysqlx_source.{quoted[column]}" for column in columns])
+		tail += f" WHEN NOT MATCHED THEN INSERT ({names}) VALUES ({values});"
+		return head, row, tail
+
+	head = f"INSERT INTO {table} ({names}) VALUES "
+	if provider == "mysql":
+		if not update_columns:
+			# mysql matches the row of any unique key, setting a column to itself keeps the existing row.
+			column = quoted[key_columns[0]]
+			return head, row, f" ON DUPLICATE KEY UPDATE {column} = {column}"
+		sets = ", ".join([f"{quoted[column]} = VALUES({quoted[column]})" for column in update_columns])
+		return head, row, f" ON DUPLICATE KEY UPDATE {sets}"
+
+	keys = ", ".join([quoted[column] for column in key_columns])
+	if not update_columns:
+		return head, row, f" ON CONFLICT ({keys}) DO NOTHING"
+	sets = ", ".join([f"{quoted[column]} = EXCLUDED.{quoted[column]}" for column in update_columns])
+	return head, row, f" ON CONFLICT ({keys}) DO UPDATE SET {sets}"
+
+
+def build_update_sql(provider: PROVIDER, table: str, columns: List[str], key: str) -> Tuple[str, str, str, str]:
+	"""
+	Return the head, the row, the row separator and the tail of an UPDATE joined to the rows by *key*.
+
+	The columns out of the key are updated with the values of the row with the same key.
+	"""
+	check_table(name=table)
+	check_columns(columns=columns)
+	check_identifier(name=key)
+	if key not in columns:
+		raise ValueError(f"invalid key: {key!r}, the key column must be in the rows")
+
+	updates = [column for column in columns if column != key]
+	if not updates:
+		raise ValueError(f"invalid columns: {columns!r}, the rows must have a column out of the key")
+
+	quoted = {column: quote_identifier(provider, column) for column in columns}
+	table = quote_identifier(provider, table)
+	names = ", ".join(quoted.values())
+	row = f"({', '.join([f':{column}' for column in columns])})"
+	sets = ", ".join([f"{quoted[column]} = pysqlx_values.{quoted[column]}" for column in updates])
+
+	if provider == "mysql":
+		# a derived table of SELECTs, the VALUES ROW() constructor is not supported by every mysql version.
+		row = f"SELECT {', '.join([f':{column} AS {quoted[column]}' for column in columns])}"
+		sets = ", ".join([f"{table}.{quoted[column]} = pysqlx_values.{quoted[column]}" for column in updates])
+		head = f"UPDATE {table} JOIN ("
+		tail = f") AS pysqlx_values ON {table}.{quoted[key]} = pysqlx_values.{quoted[key]} SET {sets}"
+		return head, row, " UNION ALL ", tail
+
+	if provider == "sqlserver":
+		head = f"UPDATE pysqlx_target SET {sets} FROM {table} AS pysqlx_target JOIN (VALUES "
+		tail = f") AS pysqlx_values ({names}) ON pysqlx_target.{quoted[key]} = pysqlx_values.{quoted[key]}"
+		return head, row, ", ", tail
+
+	head = f"WITH pysqlx_values ({names}) AS (VALUES "
+	tail = f") UPDATE {table} SET {sets} FROM pysqlx_values WHERE {table}.{quoted[key]} = pysqlx_values.{quoted[key]}"
+	return head, row, ", ", tail
+
+
+def build_delete_sql(provider: PROVIDER, table: str, key: str) -> Tuple[str, str, str]:
+	"""
+	Return the head, the row and the tail of a DELETE of the rows with the *key* in an IN list.
+	"""
+	check_table(name=table)
+	check_identifier(name=key)
+	table, column = quote_identifier(provider, table), quote_identifier(provider, key)
+	return f"DELETE FROM {table} WHERE {column} IN (", f":{key}", ")"
+
+
 def aspawn(f: Callable, args: tuple = (), name: Union[str, None] = None) -> PySQLXTask:
 	"""
 	Equivalent to asyncio.create_task.
@@ -6,6 +6,7 @@ from pysqlx_engine import PySQLXEngine
 from pysqlx_engine._core.const import LOG_CONFIG
 from pysqlx_engine._core.errors import ParameterInvalidProviderError, ParameterInvalidValueError
 from pysqlx_engine._core.param import try_tuple_enum
+from pysqlx_engine._core.util import quote_identifier
 from pysqlx_engine.errors import ExecuteError
 from tests.common import adb_mssql, adb_mysql, adb_pgsql, adb_sqlite
 
@@ -163,3 +164,283 @@ async def test_execute_sql_with_array_enum(db):
 
 	with pytest.raises(ParameterInvalidValueError):
 		try_tuple_enum("postgresql", (EnumTest.black, 1), "")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_execute_many(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_aexecute_many;")
+	await conn.execute(sql="CREATE TABLE pysql_aexecute_many (id INT PRIMARY KEY, name VARCHAR(50));")
+
+	sql = "INSERT INTO pysql_aexecute_many (id, name) VALUES (:id, :name);"
+	rows = [{"id": i, "name": f"name-{i}"} for i in range(250)]
+	assert await conn.execute_many(sql=sql, parameters=rows, batch_size=100) == 250
+	assert await conn.execute_many(sql=sql, parameters=[]) == 0
+
+	resp = await conn.query_first(sql="SELECT COUNT(*) AS total, MAX(name) AS name FROM pysql_aexecute_many")
+	assert resp.total == 250
+	assert resp.name == "name-99"
+
+	sql = "UPDATE pysql_aexecute_many SET name = :name WHERE id = :id"
+	assert await conn.execute_many(sql=sql, parameters=[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]) == 2
+	assert (await conn.query_first(sql="SELECT name FROM pysql_aexecute_many WHERE id = 2")).name == "b"
+
+	await conn.execute(sql="DROP TABLE pysql_aexecute_many;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_execute_many_rollback(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_aexecute_many_rb;")
+	await conn.execute(sql="CREATE TABLE pysql_aexecute_many_rb (id INT PRIMARY KEY, name VARCHAR(50));")
+
+	sql = "INSERT INTO pysql_aexecute_many_rb (id, name) VALUES (:id, :name)"
+	rows = [{"id": i, "name": "a"} for i in range(10)] + [{"id": 0, "name": "duplicated"}]
+	with pytest.raises(ExecuteError):
+		await conn.execute_many(sql=sql, parameters=rows, batch_size=4)
+	assert conn._on_transaction is False
+	assert (await conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_aexecute_many_rb")).total == 0
+
+	with pytest.raises(TypeError):
+		await conn.execute_many(sql=sql, parameters=[{"id": 1}])
+
+	with pytest.raises(ValueError):
+		await conn.execute_many(sql=sql, parameters=rows, batch_size=0)
+
+	# the open transaction is kept
+	await conn.begin()
+	assert await conn.execute_many(sql=sql, parameters=rows[:3]) == 3
+	assert conn._on_transaction is True
+	await conn.rollback()
+	assert (await conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_aexecute_many_rb")).total == 0
+
+	await conn.execute(sql="DROP TABLE pysql_aexecute_many_rb;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_bulk_insert(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_abulk_insert;")
+	await conn.execute(sql="CREATE TABLE pysql_abulk_insert (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+
+	columns = ["id", "name", "age"]
+	rows = [(i, f"name-{i}", i % 90) for i in range(300)]
+	assert await conn.bulk_insert(table="pysql_abulk_insert", columns=columns, rows=rows) == 300
+
+	rows = [{"id": 300, "name": None, "age": 1}, [301, "o'k", None]]
+	assert await conn.bulk_insert(table="pysql_abulk_insert", columns=columns, rows=rows, batch_size=5000) == 2
+
+	resp = await conn.query_first(sql="SELECT COUNT(*) AS total, SUM(id) AS ids FROM pysql_abulk_insert")
+	assert resp.total == 302
+	assert resp.ids == sum(range(302))
+	assert (await conn.query_first(sql="SELECT name, age FROM pysql_abulk_insert WHERE id = 301")).name == "o'k"
+
+	with pytest.raises(TypeError):
+		await conn.bulk_insert(table="pysql_abulk_insert", columns=columns, rows=[(1, "a")])
+
+	with pytest.raises(ValueError):
+		await conn.bulk_insert(table="pysql_abulk_insert; DROP TABLE x", columns=columns, rows=[])
+
+	with pytest.raises(ValueError):
+		await conn.bulk_insert(table="pysql_abulk_insert", columns=["id", "id"], rows=[])
+
+	await conn.execute(sql="DROP TABLE pysql_abulk_insert;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_bulk_upsert(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_abulk_upsert;")
+	await conn.execute(sql="CREATE TABLE pysql_abulk_upsert (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+
+	columns = ["id", "name", "age"]
+	rows = [{"id": i, "name": f"name-{i}", "age": 1} for i in range(200)]
+	assert await conn.bulk_upsert(table="pysql_abulk_upsert", columns=columns, rows=rows, key_columns=["id"]) == 200
+
+	rows = [(i, f"new-{i}", 2) for i in range(100, 300)]
+	assert (
+		await conn.bulk_upsert(
+			table="pysql_abulk_upsert", columns=columns, rows=rows, key_columns=["id"], batch_size=30
+		)
+		> 0
+	)
+
+	resp = await conn.query_first(sql="SELECT COUNT(*) AS total, SUM(age) AS ages FROM pysql_abulk_upsert")
+	assert resp.total == 300
+	assert resp.ages == 100 + 200 * 2
+	assert (await conn.query_first(sql="SELECT name FROM pysql_abulk_upsert WHERE id = 150")).name == "new-150"
+
+	# the last row of a repeated key is kept, also when the rows are in different chunks
+	rows = [(5, "first", 1), (6, "other", 1), (5, "last", 1)]
+	assert (
+		await conn.bulk_upsert(table="pysql_abulk_upsert", columns=columns, rows=rows, key_columns=["id"], batch_size=1)
+		> 0
+	)
+	assert (await conn.query_first(sql="SELECT name FROM pysql_abulk_upsert WHERE id = 5")).name == "last"
+
+	rows = [{"id": 0, "name": "kept", "age": 3}, {"id": 300, "name": "new", "age": 3}]
+	await conn.bulk_upsert(
+		table="pysql_abulk_upsert", columns=columns, rows=rows, key_columns=["id"], update_columns=["age"]
+	)
+	resp = await conn.query_first(sql="SELECT name, age FROM pysql_abulk_upsert WHERE id = 0")
+	assert (resp.name, resp.age) == ("name-0", 3)
+
+	await conn.bulk_upsert(
+		table="pysql_abulk_upsert", columns=columns, rows=[(0, "x", 4)], key_columns=["id"], update_columns=[]
+	)
+	assert (await conn.query_first(sql="SELECT age FROM pysql_abulk_upsert WHERE id = 0")).age == 3
+	assert await conn.bulk_upsert(table="pysql_abulk_upsert", columns=columns, rows=[], key_columns=["id"]) == 0
+
+	with pytest.raises(ValueError):
+		await conn.bulk_upsert(table="pysql_abulk_upsert", columns=columns, rows=rows, key_columns=["invalid"])
+
+	with pytest.raises(TypeError):
+		await conn.bulk_upsert(table="pysql_abulk_upsert", columns=columns, rows=[(1, "a")], key_columns=["id"])
+
+	await conn.execute(sql="DROP TABLE pysql_abulk_upsert;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mysql])
+async def test_bulk_upsert_null_keys(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_abulk_upsert_null;")
+	await conn.execute(
+		sql="CREATE TABLE pysql_abulk_upsert_null (id INT PRIMARY KEY, code VARCHAR(10) UNIQUE, name VARCHAR(50));"
+	)
+
+	# the rows with a NULL key are all inserted, only the repeated "c" is replaced by the last row
+	rows = [(1, None, "a"), (2, None, "b"), (3, "c", "c"), (4, "c", "d")]
+	assert (
+		await conn.bulk_upsert(
+			table="pysql_abulk_upsert_null", columns=["id", "code", "name"], rows=rows, key_columns=["code"]
+		)
+		== 3
+	)
+	assert (await conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_abulk_upsert_null")).total == 3
+	assert (await conn.query_first(sql="SELECT id FROM pysql_abulk_upsert_null WHERE code = 'c'")).id == 4
+
+	await conn.execute(sql="DROP TABLE pysql_abulk_upsert_null;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_mysql])
+async def test_bulk_upsert_conflict_on_other_unique_key(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_abulk_upsert_unique;")
+	await conn.execute(
+		sql="CREATE TABLE pysql_abulk_upsert_unique (id INT PRIMARY KEY, code VARCHAR(10) UNIQUE, name VARCHAR(50));"
+	)
+	await conn.bulk_insert(table="pysql_abulk_upsert_unique", columns=["id", "code", "name"], rows=[(1, "a", "first")])
+
+	# mysql matches the row by the code, the existing row keeps its id and name
+	rows = [(2, "a", "second")]
+	await conn.bulk_upsert(
+		table="pysql_abulk_upsert_unique",
+		columns=["id", "code", "name"],
+		rows=rows,
+		key_columns=["id"],
+		update_columns=[],
+	)
+	resp = await conn.query_first(
+		sql="SELECT COUNT(*) AS total, MAX(id) AS id, MAX(name) AS name FROM pysql_abulk_upsert_unique"
+	)
+	assert (resp.total, resp.id, resp.name) == (1, 1, "first")
+
+	await conn.execute(sql="DROP TABLE pysql_abulk_upsert_unique;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_bulk_update_and_delete(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_abulk_update;")
+	await conn.execute(
+		sql="CREATE TABLE pysql_abulk_update (id INT PRIMARY KEY, name VARCHAR(50), age INT CHECK (age >= 0));"
+	)
+	await conn.bulk_insert(
+		table="pysql_abulk_update", columns=["id", "name", "age"], rows=[(i, "a", 1) for i in range(300)]
+	)
+
+	rows = [{"id": i, "name": f"new-{i}", "age": 2} for i in range(0, 300, 2)]
+	assert await conn.bulk_update(table="pysql_abulk_update", rows=rows, key="id", batch_size=40) == 150
+	assert await conn.bulk_update(table="pysql_abulk_update", rows=[{"id": 1, "age": None}]) == 1
+
+	resp = await conn.query_first(sql="SELECT COUNT(*) AS total, SUM(age) AS ages FROM pysql_abulk_update")
+	assert (resp.total, resp.ages) == (300, 150 * 2 + 149)
+	resp = await conn.query_first(sql="SELECT name, age FROM pysql_abulk_update WHERE id = 10")
+	assert (resp.name, resp.age) == ("new-10", 2)
+
+	# the last row of a repeated key is kept, also when the rows are in different chunks
+	rows = [{"id": 20, "name": "first"}, {"id": 21, "name": "other"}, {"id": 20, "name": "last"}]
+	assert await conn.bulk_update(table="pysql_abulk_update", rows=rows, batch_size=1) == 2
+	assert (await conn.query_first(sql="SELECT name FROM pysql_abulk_update WHERE id = 20")).name == "last"
+
+	assert await conn.bulk_delete(table="pysql_abulk_update", keys=list(range(0, 300, 3)), batch_size=30) == 100
+	assert await conn.bulk_delete(table="pysql_abulk_update", keys=[]) == 0
+	assert (await conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_abulk_update")).total == 200
+
+	# the open transaction is kept
+	await conn.begin()
+	assert await conn.bulk_delete(table="pysql_abulk_update", keys=[1, 2]) == 2
+	assert await conn.bulk_update(table="pysql_abulk_update", rows=[{"id": 4, "name": "b"}]) == 1
+	await conn.rollback()
+	assert (await conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_abulk_update")).total == 200
+	assert (await conn.query_first(sql="SELECT name FROM pysql_abulk_update WHERE id = 4")).name == "new-4"
+
+	# a failed chunk rolls back the chunks already sent
+	rows = [{"id": i, "name": "failed", "age": -1 if i == 298 else 1} for i in range(4, 300, 2)]
+	with pytest.raises(ExecuteError):
+		await conn.bulk_update(table="pysql_abulk_update", rows=rows, batch_size=30)
+	assert (await conn.query_first(sql="SELECT name FROM pysql_abulk_update WHERE id = 4")).name == "new-4"
+	assert conn._on_transaction is False
+
+	with pytest.raises(ValueError):
+		await conn.bulk_update(table="pysql_abulk_update", rows=[{"id": 1}])
+
+	with pytest.raises(ValueError):
+		await conn.bulk_update(table="pysql_abulk_update", rows=[{"name": "a"}])
+
+	with pytest.raises(TypeError):
+		await conn.bulk_delete(table="pysql_abulk_update", keys=1)
+
+	await conn.execute(sql="DROP TABLE pysql_abulk_update;")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_bulk_reserved_and_mixed_case_columns(db):
+	conn: PySQLXEngine = await db()
+	key, order, user = [quote_identifier(conn._provider, name) for name in ("Key", "order", "user")]
+	await conn.execute(sql="DROP TABLE IF EXISTS pysql_abulk_reserved;")
+	await conn.execute(
+		sql=f"CREATE TABLE pysql_abulk_reserved ({key} INT PRIMARY KEY, {order} INT, {user} VARCHAR(50));"
+	)
+
+	columns = ["Key", "order", "user"]
+	rows = [(i, i, f"user-{i}") for i in range(10)]
+	assert await conn.bulk_insert(table="pysql_abulk_reserved", columns=columns, rows=rows) == 10
+
+	rows = [{"Key": 9, "order": 90, "user": "new"}, {"Key": 10, "order": 10, "user": "user-10"}]
+	assert await conn.bulk_upsert(table="pysql_abulk_reserved", columns=columns, rows=rows, key_columns=["Key"]) > 0
+	assert await conn.bulk_update(table="pysql_abulk_reserved", rows=[{"Key": 0, "order": 100}], key="Key") == 1
+	assert await conn.bulk_delete(table="pysql_abulk_reserved", keys=[1, 2], key="Key") == 2
+
+	resp = await conn.query_first(sql=f"SELECT COUNT(*) AS total, SUM({order}) AS orders FROM pysql_abulk_reserved")
+	assert (resp.total, resp.orders) == (9, 45 - 9 + 90 + 10 + 100 - 3)
+	resp = await conn.query_first(sql=f"SELECT {user} AS name FROM pysql_abulk_reserved WHERE {key} = 9")
+	assert resp.name == "new"
+
+	await conn.execute(sql="DROP TABLE pysql_abulk_reserved;")
+	await conn.close()
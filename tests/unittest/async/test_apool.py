@@ -1,9 +1,11 @@
 import asyncio
+import time
 import unittest.mock
 
 import pytest
 
-from pysqlx_engine import PySQLXEnginePool
+from pysqlx_engine import PySQLXEngine, PySQLXEnginePool
+from pysqlx_engine._core.abc.base_pool import IdleStack
 from pysqlx_engine._core.abc.conn import validate_uri
 from pysqlx_engine._core.apool import Monitor
 from pysqlx_engine._core.errors import (
@@ -158,7 +160,7 @@ def test_pool_initialization_raise():
 async def test_monitor_break_if_queue_is_empty():
 	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1)
 	pool._opened = True
-	with unittest.mock.patch.object(pool._pool, "get_nowait", side_effect=asyncio.QueueEmpty):
+	with unittest.mock.patch.object(IdleStack, "get_oldest_nowait", return_value=[]):
 		monitor = Monitor(pool=pool)
 		pool._pool.put_nowait("test")
 		assert pool._name in repr(monitor)
@@ -193,12 +195,13 @@ async def test_pool_stop_raise():
 
 @pytest.mark.asyncio
 async def test_pool_timeout_raise():
-	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, conn_timeout=1)
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=2, conn_timeout=1)
 	await pool.start()
 	await asyncio.sleep(1)
-	async with pool.connection() as conn:
+	async with pool.connection() as conn, pool.connection() as _:
 		assert conn is not None, "Connection should not be None"
 		assert pool._pool.qsize() < 1, "Connection should be removed from the pool"
+		assert pool._size == pool._max_size, "The pool should grow up to max_size"
 		with pytest.raises(PoolTimeoutError):
 			async with pool.connection() as _:
 				...  # pragma: no cover
@@ -228,7 +231,7 @@ async def test_pool_on_transaction():
 		assert conn is not None, "Connection should not be None"
 		assert pool._pool.qsize() < 1, "Connection should be removed from the pool"
 		await conn.start_transaction()
-	pool._pool.qsize() == 0
+	assert pool._pool.qsize() == 1, "The connection is rolled back and returned to the pool"
 	await pool.stop()
 
 
@@ -244,7 +247,7 @@ async def test_pool_start_twice():
 @pytest.mark.asyncio
 async def test_pool_start_generate_raise():
 	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1)
-	with unittest.mock.patch.object(pool._pool, "put", side_effect=Exception):
+	with unittest.mock.patch.object(IdleStack, "put_nowait", side_effect=Exception):
 		with pytest.raises(Exception):
 			await pool.start()
 
@@ -265,10 +268,49 @@ async def test_pool_get_ready_conn():
 	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=10, conn_timeout=3)
 	await pool.start()
 	await asyncio.sleep(1)
-	with unittest.mock.patch.object(pool._pool, "get", side_effect=asyncio.TimeoutError):
-		assert await pool._get_ready_conn() is None
+	conns = [await pool._get_ready_conn(timeout=1) for _ in range(pool._max_size)]
+	assert all(conn is not None for conn in conns)
+	assert await pool._get_ready_conn(timeout=0.1) is None
+	assert len(pool._waiters) == 0, "The waiter should be removed on timeout"
+	for conn in conns:
+		await pool._put_conn_unchecked(conn)
+
+	await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_connection_to_waiter():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=1, conn_timeout=5)
+	await pool.start()
+	order = []
 
+	async def use(name: str, hold: float):
+		async with pool.connection():
+			order.append(name)
+			await asyncio.sleep(hold)
+
+	first = asyncio.create_task(use("first", 0.2))
+	await asyncio.sleep(0.05)
+	waiters = [asyncio.create_task(use(f"waiter-{i}", 0.01)) for i in range(3)]
+	await asyncio.gather(first, *waiters)
+
+	assert order == ["first", "waiter-0", "waiter-1", "waiter-2"], "Waiters should be served in FIFO order"
+	assert not pool._waiters, "All the waiters should be served"
+	await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_stop_wakes_waiters():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=1, conn_timeout=5)
+	await pool.start()
+	conns = [await pool._get_conn() for _ in range(pool._max_size)]
+	waiter = asyncio.create_task(pool._get_conn())
+	await asyncio.sleep(0.05)
 	await pool.stop()
+	with pytest.raises(PoolClosedError):
+		await waiter
+	for conn in conns:
+		await conn.close()
 
 
 @pytest.mark.asyncio
@@ -293,28 +335,243 @@ def test_validate_uri():
 
 
 @pytest.mark.asyncio
-async def test_monitor_growing_creates_new_connections():
-	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=0.5)
-	pool._opened = True
-	await pool._put_conn(await pool._new_conn_unchecked())
-	# Initially, the pool should have min_size connections
+async def test_pool_grows_with_the_waiters():
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, max_size=10, check_interval=1, max_concurrent_connects=4)
 	assert pool._size == 1
-	# Set the pool to grow
-	pool._growing = True
 
-	monitor = Monitor(pool=pool)
-	t = asyncio.create_task(monitor.run())
-	await asyncio.sleep(2)
-	pool._opened = False
-	# Check if a new connection is created when the pool is growing
+	connecting = []
+	new_conn_unchecked = pool._new_conn_unchecked
+
+	async def new_conn():
+		connecting.append(pool._connecting)
+		return await new_conn_unchecked()
+
+	pool._new_conn_unchecked = new_conn
+
+	async def use():
+		async with pool.connection():
+			await asyncio.sleep(0.3)
+
+	await asyncio.gather(*[use() for _ in range(6)])
+	# 1 idle connection, 5 waiters limited to 4 concurrent connects, the 5th waiter reuses a returned connection
+	assert pool._size == 5
+	assert max(connecting) == 4
+	assert pool._connecting == 0
+	await pool.stop()
+
+
+def test_conns_to_grow():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=10, check_interval=10, max_concurrent_connects=3)
+	pool._size = 2
+	assert pool._conns_to_grow(waiting=0) == 0
+	assert pool._conns_to_grow(waiting=2) == 2
+	assert pool._conns_to_grow(waiting=20) == 3
+
+	pool._connecting = 2
+	assert pool._conns_to_grow(waiting=2) == 0
+	assert pool._conns_to_grow(waiting=5) == 1
+
+	pool._connecting = 0
+	pool._size = 9
+	assert pool._conns_to_grow(waiting=5) == 1
+
+	with pytest.raises(AssertionError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_concurrent_connects=0)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("uri", [SQLITE_URI, PGSQL_URI, MSSQL_URI, MYSQL_URI])
+async def test_pool_reuses_the_core_connection(uri: str):
+	pool = await get_pool(uri=uri, min_size=1, check_interval=1)
+	async with pool.connection() as conn:
+		await conn.query(sql="SELECT 1 AS id")
+		first, core = conn, conn._conn
+
+	async with pool.connection() as conn:
+		assert conn is first, "The idle connection should be reused"
+		await conn.query(sql="SELECT 1 AS id")
+		assert conn._conn is core, "The prepared statements of the core are kept with its connection"
+	await pool.stop()
+
+
+def test_can_trim():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=10, idle_timeout=10, min_idle=1, max_idle=4)
+	conn = unittest.mock.Mock(returned_at=time.monotonic())
+	pool._size = 5
+	assert pool._can_trim(conn=conn, idle=2, trimmed=0) is False
+	assert pool._can_trim(conn=conn, idle=4, trimmed=3) is True
+
+	conn.returned_at -= 11
+	assert pool._can_trim(conn=conn, idle=2, trimmed=0) is True
+	assert pool._can_trim(conn=conn, idle=2, trimmed=1) is False, "Only one connection is trimmed per check"
+	assert pool._can_trim(conn=conn, idle=0, trimmed=0) is False, "The min_idle is kept"
+
+	pool._size = 1
+	assert pool._can_trim(conn=conn, idle=4, trimmed=0) is False, "The min_size is kept"
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, min_idle=3, max_idle=2)
+
+	with pytest.raises(AssertionError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, idle_timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_pool_trims_idle_connections():
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, max_size=5, check_interval=0.1, idle_timeout=0.3)
+	conns = [await pool._get_conn() for _ in range(4)]
+	for conn in conns:
+		await pool._put_conn(conn)
+	assert pool._size == 4
+
+	sizes = []
+	for _ in range(30):
+		sizes.append(pool._size)
+		if pool._size == 1:
+			break
+		await asyncio.sleep(0.1)
+
+	assert pool._size == 1
+	assert 3 in sizes and 2 in sizes, "The pool shrinks progressively"
+	await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_min_and_max_idle():
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, max_size=5, check_interval=0.1, idle_timeout=None, max_idle=2)
+	conns = [await pool._get_conn() for _ in range(4)]
+	for conn in conns:
+		await pool._put_conn(conn)
+	await asyncio.sleep(0.5)
 	assert pool._size == 2
-	await t
+	await pool.stop()
+
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, max_size=3, check_interval=0.1, min_idle=2)
+	await asyncio.sleep(0.5)
+	assert pool._size == 2
+	async with pool.connection():
+		await asyncio.sleep(0.5)
+		assert pool._size == 3
+		assert pool._pool.qsize() == 2
+	await pool.stop()
 
 
 @pytest.mark.asyncio
-async def test_check_grow():
-	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=2, check_interval=10)
-	pool._size = 2
-	assert pool._waiting == 0
-	assert pool._growing is False
-	assert await pool._check_grow(1) is None
+@pytest.mark.parametrize("policy", ["lifo", "fifo"])
+async def test_pool_policy(policy: str):
+	pool = await get_pool(uri=SQLITE_URI, min_size=3, max_size=4, check_interval=1, policy=policy)
+	await asyncio.sleep(0.2)  # the monitor checks the idle connections on start
+	async with pool.connection() as first:
+		...
+	async with pool.connection() as conn:
+		assert (conn is first) is (policy == "lifo")
+	await pool.stop()
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, policy="random")
+
+
+@pytest.mark.asyncio
+async def test_pool_stats():
+	pool = await get_pool(uri=SQLITE_URI, min_size=2, max_size=3, check_interval=1, conn_timeout=0.2)
+	stats = pool.stats()
+	assert (stats.size, stats.idle, stats.in_use, stats.waiting) == (2, 2, 0, 0)
+	assert (stats.created, stats.closed, stats.failed, stats.timeouts) == (2, 0, 0, 0)
+	assert stats.age.count == 2
+
+	conns = [await pool._get_conn() for _ in range(3)]
+	stats = pool.stats()
+	assert (stats.size, stats.idle, stats.in_use) == (3, 0, 3)
+	assert stats.created == 3
+	assert stats.acquire_wait.count == 3
+
+	with pytest.raises(PoolTimeoutError):
+		await pool._get_conn()
+	assert pool.stats().timeouts == 1
+
+	await asyncio.sleep(0.01)
+	for conn in conns:
+		await pool._put_conn(conn)
+	stats = pool.stats()
+	assert (stats.idle, stats.in_use) == (3, 0)
+	assert stats.hold_time.count == 3
+	assert stats.hold_time.sum >= 0.03
+	await pool.stop()
+
+	stats = pool.stats()
+	assert (stats.size, stats.closed, stats.age.count) == (0, 3, 0)
+
+	pool = PySQLXEnginePool(uri="sqlite:/invalid/path/db.db", min_size=1)
+	with pytest.raises(Exception):
+		await pool.start()
+	assert pool.stats().failed == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_verify():
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, check_interval=1, ping_sql="SELECT 1")
+	conn = await pool._get_conn()
+	with unittest.mock.patch.object(PySQLXEngine, "raw_cmd", side_effect=Exception("broken")) as ping:
+		conn.last_verified = time.monotonic()
+		assert await pool._verify(conn=conn, idle=10) is True, "A connection verified recently is not pinged"
+		assert ping.call_count == 0
+
+		conn.last_verified -= 11
+		assert await pool._verify(conn=conn, idle=10) is False
+		assert ping.call_count == 1
+
+	verified = conn.last_verified
+	assert await pool._verify(conn=conn, idle=0) is True
+	assert conn.last_verified > verified
+	await pool._put_conn(conn)
+	await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_health_check_on_borrow():
+	pool = await get_pool(
+		uri=SQLITE_URI, min_size=1, check_interval=1, health_check="on_borrow_if_idle_gt=0", ping_sql="SELECT 1"
+	)
+	async with pool.connection() as first:
+		...
+
+	with unittest.mock.patch.object(PySQLXEngine, "raw_cmd", side_effect=[Exception("broken"), None]) as ping:
+		await asyncio.sleep(0.01)
+		async with pool.connection() as conn:
+			assert conn is not first, "The broken connection is replaced"
+		assert ping.call_count == 2
+
+	stats = pool.stats()
+	assert (stats.size, stats.closed) == (1, 1)
+	await pool.stop()
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, health_check="always")
+
+
+@pytest.mark.asyncio
+async def test_pool_resets_connection_on_return():
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, check_interval=1, reset_sql="SELECT 1")
+	async with pool.connection() as conn:
+		await conn.execute(sql="DROP TABLE IF EXISTS pysql_apool_reset")
+		await conn.execute(sql="CREATE TABLE pysql_apool_reset (id INTEGER)")
+		await conn.start_transaction()
+		await conn.execute(sql="INSERT INTO pysql_apool_reset (id) VALUES (1)")
+		first = conn
+
+	async with pool.connection() as conn:
+		assert conn is first, "The connection is rolled back and reused"
+		assert conn._on_transaction is False
+		assert await conn.query(sql="SELECT id FROM pysql_apool_reset") == []
+		await conn.execute(sql="DROP TABLE pysql_apool_reset")
+	await pool.stop()
+
+	pool = await get_pool(uri=SQLITE_URI, min_size=1, check_interval=1, reset_sql="INVALID SQL")
+	async with pool.connection() as conn:
+		await conn.start_transaction()
+		first = conn
+
+	assert pool.stats().closed == 1, "The connection is closed when the reset fails"
+	async with pool.connection() as conn:
+		assert conn is not first
+	await pool.stop()
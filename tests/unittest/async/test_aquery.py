@@ -1,12 +1,14 @@
+import asyncio
 import enum
 import logging
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import date, datetime, time, timezone
 from decimal import Decimal
 
 import pytest
 
-from pysqlx_engine import BaseRow, PySQLXEngine
+from pysqlx_engine import BaseRow, PreparedQuery, PySQLXEngine
 from pysqlx_engine._core.const import LOG_CONFIG
 from pysqlx_engine._core.errors import ParameterInvalidValueError, QueryError
 from tests.common import adb_mssql, adb_mysql, adb_pgsql, adb_sqlite
@@ -1351,3 +1353,274 @@ async def test_query_unicode_param(db: PySQLXEngine):
 
 	await conn.close()
 	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_trusted(db):
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	class MyModel(BaseRow):
+		id: float
+		name: str
+
+	sql = "SELECT 1 AS id, 'Rian' AS name"
+	assert await conn.query(sql=sql, trusted=True) == await conn.query(sql=sql)
+
+	rows = await conn.query(sql=sql, model=MyModel, trusted=True)
+	assert isinstance(rows[0], MyModel)
+	assert isinstance(rows[0].id, int)  # not coerced to float
+
+	row = await conn.query_first(sql=sql, model=MyModel, trusted=True)
+	assert isinstance(row.id, int)
+
+	row = await conn.query_first(sql=sql, model=MyModel)
+	assert isinstance(row.id, float)
+
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_as_tuples(db):
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	sql = "SELECT 1 AS id, 'Rian' AS name"
+	columns, rows = await conn.query_as_tuples(sql=sql)
+	assert columns == ("id", "name")
+	assert rows == [(1, "Rian")]
+
+	columns, rows = await conn.query_as_tuples(sql=sql, named=True)
+	assert rows[0].id == 1
+	assert rows[0].name == "Rian"
+
+	columns, row = await conn.query_first_as_tuple(sql="SELECT :number AS number", parameters={"number": 10})
+	assert columns == ("number",)
+	assert row == (10,)
+
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_as_columns(db):
+	from array import array
+
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	data = await conn.query_as_columns(sql="SELECT 1 AS id, 'Rian' AS name")
+	assert isinstance(data["id"], array)
+	assert list(data["id"]) == [1]
+	assert data["name"] == ["Rian"]
+
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_as_numpy_and_dataframe(db):
+	pytest.importorskip("numpy")
+	pytest.importorskip("pandas")
+
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	result = await conn.query_as_numpy(sql="SELECT 1 AS id, 'Rian' AS name")
+	assert result["id"].tolist() == [1]
+
+	df = await conn.query_as_dataframe(sql="SELECT 1 AS id, 'Rian' AS name")
+	assert df["name"].tolist() == ["Rian"]
+
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_lazy(db):
+	from pysqlx_engine import LazyRows
+
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	sql = "SELECT 1 AS id, 'Rian' AS name"
+	rows = await conn.query(sql=sql, lazy=True)
+	assert isinstance(rows, LazyRows)
+	assert rows == await conn.query(sql=sql)
+
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_stream(db):
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	await conn.execute(sql="CREATE TABLE pysql_astream (id INT, name VARCHAR(10))")
+	values = ", ".join(f"({i}, 'name-{i}')" for i in range(1, 26))
+	await conn.execute(sql=f"INSERT INTO pysql_astream (id, name) VALUES {values}")
+
+	rows = [row async for row in conn.query_stream(sql="SELECT id, name FROM pysql_astream", batch_size=10)]
+	assert [row.id for row in rows] == list(range(1, 26))
+
+	batches = [b async for b in conn.query_stream(sql="SELECT * FROM pysql_astream", batch_size=10, batch=True)]
+	assert [len(batch) for batch in batches] == [10, 10, 5]
+
+	await conn.execute(sql="INSERT INTO pysql_astream (id, name) VALUES (10, 'repeated')")
+	with pytest.raises(ValueError, match="unique"):
+		[row async for row in conn.query_stream(sql="SELECT id, name FROM pysql_astream", batch_size=10)]
+
+	await conn.execute(sql="DROP TABLE pysql_astream")
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql])
+async def test_query_first_with_data_modifying_cte(db):
+	conn: PySQLXEngine = await db()
+	await conn.execute(sql="CREATE TABLE pysql_afirst_cte (id INT, name VARCHAR(10))")
+	await conn.execute(sql="INSERT INTO pysql_afirst_cte (id, name) VALUES (1, 'a'), (2, 'b')")
+
+	row = await conn.query_first(sql="WITH x AS (SELECT 1 AS id) UPDATE pysql_afirst_cte SET name = 'c' RETURNING *")
+	assert row.name == "c"
+	assert (await conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_afirst_cte WHERE name = 'c'")).total == 2
+
+	sql = "WITH x AS (SELECT 1 AS id) DELETE FROM pysql_afirst_cte WHERE id IN (SELECT id FROM x) RETURNING id"
+	assert (await conn.query_first(sql=sql)).id == 1
+
+	await conn.execute(sql="DROP TABLE pysql_afirst_cte")
+	await conn.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_first_fetches_one_row(db):
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	await conn.execute(sql="CREATE TABLE pysql_afirst (id INT, name VARCHAR(10))")
+	values = ", ".join(f"({i}, 'name-{i}')" for i in range(1, 26))
+	await conn.execute(sql=f"INSERT INTO pysql_afirst (id, name) VALUES {values}")
+
+	row = await conn.query_first(sql="SELECT id, name FROM pysql_afirst ORDER BY id DESC;")
+	assert row.id == 25
+
+	row = await conn.query_first_as_dict(sql="SELECT id, name FROM pysql_afirst ORDER BY id")
+	assert row == {"id": 1, "name": "name-1"}
+
+	await conn.execute(sql="DROP TABLE pysql_afirst")
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_prepare(db):
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	class Item(BaseRow):
+		id: int
+		name: str
+
+	await conn.execute(sql="CREATE TABLE pysql_aprepare (id INT, name VARCHAR(10))")
+	insert = conn.prepare(
+		sql="INSERT INTO pysql_aprepare (id, name) VALUES (:id, :name)", param_types={"id": int, "name": str}
+	)
+	for i in range(1, 6):
+		assert await insert.execute(parameters={"id": i, "name": f"name-{i}"}) == 1
+
+	select = conn.prepare(sql="SELECT id, name FROM pysql_aprepare WHERE id >= :id ORDER BY id", model=Item)
+	assert isinstance(select, PreparedQuery)
+	rows = await select(parameters={"id": 3})
+	assert [row.id for row in rows] == [3, 4, 5]
+	assert await select.query_first(parameters={"id": 2}) == Item(id=2, name="name-2")
+	assert await select.query_first(parameters={"id": 10}) is None
+
+	with pytest.raises(TypeError):
+		await insert.execute(parameters={"id": 1, "name": "a", "other": 1})
+
+	with pytest.raises(TypeError):
+		await insert.execute(parameters={"id": "1", "name": "a"})
+
+	with pytest.raises(TypeError):
+		await insert.execute(parameters={"id": True, "name": "a"})
+
+	assert await insert.execute(parameters={"id": 6, "name": None}) == 1
+
+	count = conn.prepare(sql="SELECT COUNT(*) AS total FROM pysql_aprepare", param_types={})
+	assert (await count.query_first()).total == 6
+	with pytest.raises(TypeError):
+		await count.query(parameters={"id": 1})
+
+	await conn.execute(sql="DROP TABLE pysql_aprepare")
+	await conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("db", [adb_sqlite, adb_pgsql, adb_mssql, adb_mysql])
+async def test_query_chunked(db):
+	conn: PySQLXEngine = await db()
+	assert conn.connected is True
+
+	await conn.execute(sql="CREATE TABLE pysql_achunk (id INT, name VARCHAR(10))")
+	values = ", ".join(f"({i}, 'name-{i}')" for i in range(1, 101))
+	await conn.execute(sql=f"INSERT INTO pysql_achunk (id, name) VALUES {values}")
+
+	ticks = 0
+
+	async def tick():
+		nonlocal ticks
+		while True:
+			ticks += 1
+			await asyncio.sleep(0)
+
+	task = asyncio.create_task(tick())
+	await asyncio.sleep(0)
+	before = ticks
+	rows = await conn.query(sql="SELECT id, name FROM pysql_achunk ORDER BY id", chunk_size=10)
+	assert ticks - before >= 9, "The event loop runs between the chunks"
+	task.cancel()
+
+	assert isinstance(rows, list)
+	assert rows == await conn.query(sql="SELECT id, name FROM pysql_achunk ORDER BY id")
+
+	with ThreadPoolExecutor(max_workers=2) as executor:
+		rows = await conn.query(sql="SELECT id, name FROM pysql_achunk ORDER BY id", chunk_size=30, executor=executor)
+	assert [row.id for row in rows] == list(range(1, 101))
+
+	assert await conn.query(sql="SELECT id FROM pysql_achunk WHERE id = 0", chunk_size=10) == []
+
+	with pytest.raises(ValueError):
+		await conn.query(sql="SELECT id FROM pysql_achunk", chunk_size=0)
+
+	with pytest.raises(TypeError):
+		await conn.query(sql="SELECT id FROM pysql_achunk", chunk_size=1.5)
+
+	with pytest.raises(TypeError):
+		await conn.query(sql="SELECT id FROM pysql_achunk", chunk_size=True)
+
+	with pytest.raises(ValueError):
+		await conn.query(sql="SELECT id FROM pysql_achunk", lazy=True, chunk_size=10)
+
+	with ThreadPoolExecutor(max_workers=1) as executor:
+		with pytest.raises(ValueError):
+			await conn.query(sql="SELECT id FROM pysql_achunk", lazy=True, executor=executor)
+
+	with ProcessPoolExecutor(max_workers=1) as executor:
+		with pytest.raises(TypeError):
+			await conn.query(sql="SELECT id FROM pysql_achunk", executor=executor)
+
+	await conn.execute(sql="DROP TABLE pysql_achunk")
+	await conn.close()
+	assert conn.connected is False
@@ -1,6 +1,7 @@
 import pytest
 
 from pysqlx_engine import PySQLXEngineSync
+from pysqlx_engine._core.util import quote_identifier
 from pysqlx_engine.errors import ExecuteError
 from tests.common import db_mssql, db_mysql, db_pgsql, db_sqlite
 
@@ -110,3 +111,260 @@ def test_execute_sql_with_complex_param(db: PySQLXEngineSync):
 	resp = conn.execute(sql="DROP TABLE IF EXISTS pysqlx_table;")
 	assert resp == 0
 	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_execute_many(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_execute_many;")
+	conn.execute(sql="CREATE TABLE pysql_execute_many (id INT PRIMARY KEY, name VARCHAR(50));")
+
+	sql = "INSERT INTO pysql_execute_many (id, name) VALUES (:id, :name);"
+	rows = [{"id": i, "name": f"name-{i}"} for i in range(250)]
+	assert conn.execute_many(sql=sql, parameters=rows, batch_size=100) == 250
+	assert conn.execute_many(sql=sql, parameters=[]) == 0
+
+	resp = conn.query_first(sql="SELECT COUNT(*) AS total, MAX(name) AS name FROM pysql_execute_many")
+	assert resp.total == 250
+	assert resp.name == "name-99"
+
+	sql = "UPDATE pysql_execute_many SET name = :name WHERE id = :id"
+	assert conn.execute_many(sql=sql, parameters=[{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]) == 2
+	assert conn.query_first(sql="SELECT name FROM pysql_execute_many WHERE id = 2").name == "b"
+
+	conn.execute(sql="DROP TABLE pysql_execute_many;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_execute_many_rollback(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_execute_many_rb;")
+	conn.execute(sql="CREATE TABLE pysql_execute_many_rb (id INT PRIMARY KEY, name VARCHAR(50));")
+
+	sql = "INSERT INTO pysql_execute_many_rb (id, name) VALUES (:id, :name)"
+	rows = [{"id": i, "name": "a"} for i in range(10)] + [{"id": 0, "name": "duplicated"}]
+	with pytest.raises(ExecuteError):
+		conn.execute_many(sql=sql, parameters=rows, batch_size=4)
+	assert conn._on_transaction is False
+	assert conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_execute_many_rb").total == 0
+
+	with pytest.raises(TypeError):
+		conn.execute_many(sql=sql, parameters=[{"id": 1}])
+
+	with pytest.raises(ValueError):
+		conn.execute_many(sql=sql, parameters=rows, batch_size=0)
+
+	# the open transaction is kept
+	conn.begin()
+	assert conn.execute_many(sql=sql, parameters=rows[:3]) == 3
+	assert conn._on_transaction is True
+	conn.rollback()
+	assert conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_execute_many_rb").total == 0
+
+	conn.execute(sql="DROP TABLE pysql_execute_many_rb;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_bulk_insert(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_bulk_insert;")
+	conn.execute(sql="CREATE TABLE pysql_bulk_insert (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+
+	columns = ["id", "name", "age"]
+	rows = [(i, f"name-{i}", i % 90) for i in range(300)]
+	assert conn.bulk_insert(table="pysql_bulk_insert", columns=columns, rows=rows) == 300
+
+	rows = [{"id": 300, "name": None, "age": 1}, [301, "o'k", None]]
+	assert conn.bulk_insert(table="pysql_bulk_insert", columns=columns, rows=rows, batch_size=5000) == 2
+
+	resp = conn.query_first(sql="SELECT COUNT(*) AS total, SUM(id) AS ids FROM pysql_bulk_insert")
+	assert resp.total == 302
+	assert resp.ids == sum(range(302))
+	assert conn.query_first(sql="SELECT name, age FROM pysql_bulk_insert WHERE id = 301").name == "o'k"
+
+	with pytest.raises(TypeError):
+		conn.bulk_insert(table="pysql_bulk_insert", columns=columns, rows=[(1, "a")])
+
+	with pytest.raises(ValueError):
+		conn.bulk_insert(table="pysql_bulk_insert; DROP TABLE x", columns=columns, rows=[])
+
+	with pytest.raises(ValueError):
+		conn.bulk_insert(table="pysql_bulk_insert", columns=["id", "id"], rows=[])
+
+	conn.execute(sql="DROP TABLE pysql_bulk_insert;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_bulk_upsert(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_bulk_upsert;")
+	conn.execute(sql="CREATE TABLE pysql_bulk_upsert (id INT PRIMARY KEY, name VARCHAR(50), age INT);")
+
+	columns = ["id", "name", "age"]
+	rows = [{"id": i, "name": f"name-{i}", "age": 1} for i in range(200)]
+	assert conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=rows, key_columns=["id"]) == 200
+
+	rows = [(i, f"new-{i}", 2) for i in range(100, 300)]
+	assert (
+		conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=rows, key_columns=["id"], batch_size=30) > 0
+	)
+
+	resp = conn.query_first(sql="SELECT COUNT(*) AS total, SUM(age) AS ages FROM pysql_bulk_upsert")
+	assert resp.total == 300
+	assert resp.ages == 100 + 200 * 2
+	assert conn.query_first(sql="SELECT name FROM pysql_bulk_upsert WHERE id = 150").name == "new-150"
+
+	# the last row of a repeated key is kept, also when the rows are in different chunks
+	rows = [(5, "first", 1), (6, "other", 1), (5, "last", 1)]
+	assert conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=rows, key_columns=["id"], batch_size=1) > 0
+	assert conn.query_first(sql="SELECT name FROM pysql_bulk_upsert WHERE id = 5").name == "last"
+
+	rows = [{"id": 0, "name": "kept", "age": 3}, {"id": 300, "name": "new", "age": 3}]
+	conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=rows, key_columns=["id"], update_columns=["age"])
+	resp = conn.query_first(sql="SELECT name, age FROM pysql_bulk_upsert WHERE id = 0")
+	assert (resp.name, resp.age) == ("name-0", 3)
+
+	conn.bulk_upsert(
+		table="pysql_bulk_upsert", columns=columns, rows=[(0, "x", 4)], key_columns=["id"], update_columns=[]
+	)
+	assert conn.query_first(sql="SELECT age FROM pysql_bulk_upsert WHERE id = 0").age == 3
+	assert conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=[], key_columns=["id"]) == 0
+
+	with pytest.raises(ValueError):
+		conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=rows, key_columns=["invalid"])
+
+	with pytest.raises(TypeError):
+		conn.bulk_upsert(table="pysql_bulk_upsert", columns=columns, rows=[(1, "a")], key_columns=["id"])
+
+	conn.execute(sql="DROP TABLE pysql_bulk_upsert;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mysql])
+def test_bulk_upsert_null_keys(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_bulk_upsert_null;")
+	conn.execute(
+		sql="CREATE TABLE pysql_bulk_upsert_null (id INT PRIMARY KEY, code VARCHAR(10) UNIQUE, name VARCHAR(50));"
+	)
+
+	# the rows with a NULL key are all inserted, only the repeated "c" is replaced by the last row
+	rows = [(1, None, "a"), (2, None, "b"), (3, "c", "c"), (4, "c", "d")]
+	assert (
+		conn.bulk_upsert(
+			table="pysql_bulk_upsert_null", columns=["id", "code", "name"], rows=rows, key_columns=["code"]
+		)
+		== 3
+	)
+	assert conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_bulk_upsert_null").total == 3
+	assert conn.query_first(sql="SELECT id FROM pysql_bulk_upsert_null WHERE code = 'c'").id == 4
+
+	conn.execute(sql="DROP TABLE pysql_bulk_upsert_null;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_mysql])
+def test_bulk_upsert_conflict_on_other_unique_key(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_bulk_upsert_unique;")
+	conn.execute(
+		sql="CREATE TABLE pysql_bulk_upsert_unique (id INT PRIMARY KEY, code VARCHAR(10) UNIQUE, name VARCHAR(50));"
+	)
+	conn.bulk_insert(table="pysql_bulk_upsert_unique", columns=["id", "code", "name"], rows=[(1, "a", "first")])
+
+	# mysql matches the row by the code, the existing row keeps its id and name
+	rows = [(2, "a", "second")]
+	conn.bulk_upsert(
+		table="pysql_bulk_upsert_unique",
+		columns=["id", "code", "name"],
+		rows=rows,
+		key_columns=["id"],
+		update_columns=[],
+	)
+	resp = conn.query_first(
+		sql="SELECT COUNT(*) AS total, MAX(id) AS id, MAX(name) AS name FROM pysql_bulk_upsert_unique"
+	)
+	assert (resp.total, resp.id, resp.name) == (1, 1, "first")
+
+	conn.execute(sql="DROP TABLE pysql_bulk_upsert_unique;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_bulk_update_and_delete(db):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_bulk_update;")
+	conn.execute(sql="CREATE TABLE pysql_bulk_update (id INT PRIMARY KEY, name VARCHAR(50), age INT CHECK (age >= 0));")
+	conn.bulk_insert(table="pysql_bulk_update", columns=["id", "name", "age"], rows=[(i, "a", 1) for i in range(300)])
+
+	rows = [{"id": i, "name": f"new-{i}", "age": 2} for i in range(0, 300, 2)]
+	assert conn.bulk_update(table="pysql_bulk_update", rows=rows, key="id", batch_size=40) == 150
+	assert conn.bulk_update(table="pysql_bulk_update", rows=[{"id": 1, "age": None}]) == 1
+
+	resp = conn.query_first(sql="SELECT COUNT(*) AS total, SUM(age) AS ages FROM pysql_bulk_update")
+	assert (resp.total, resp.ages) == (300, 150 * 2 + 149)
+	resp = conn.query_first(sql="SELECT name, age FROM pysql_bulk_update WHERE id = 10")
+	assert (resp.name, resp.age) == ("new-10", 2)
+
+	# the last row of a repeated key is kept, also when the rows are in different chunks
+	rows = [{"id": 20, "name": "first"}, {"id": 21, "name": "other"}, {"id": 20, "name": "last"}]
+	assert conn.bulk_update(table="pysql_bulk_update", rows=rows, batch_size=1) == 2
+	assert conn.query_first(sql="SELECT name FROM pysql_bulk_update WHERE id = 20").name == "last"
+
+	assert conn.bulk_delete(table="pysql_bulk_update", keys=list(range(0, 300, 3)), batch_size=30) == 100
+	assert conn.bulk_delete(table="pysql_bulk_update", keys=[]) == 0
+	assert conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_bulk_update").total == 200
+
+	# the open transaction is kept
+	conn.begin()
+	assert conn.bulk_delete(table="pysql_bulk_update", keys=[1, 2]) == 2
+	assert conn.bulk_update(table="pysql_bulk_update", rows=[{"id": 4, "name": "b"}]) == 1
+	conn.rollback()
+	assert conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_bulk_update").total == 200
+	assert conn.query_first(sql="SELECT name FROM pysql_bulk_update WHERE id = 4").name == "new-4"
+
+	# a failed chunk rolls back the chunks already sent
+	rows = [{"id": i, "name": "failed", "age": -1 if i == 298 else 1} for i in range(4, 300, 2)]
+	with pytest.raises(ExecuteError):
+		conn.bulk_update(table="pysql_bulk_update", rows=rows, batch_size=30)
+	assert conn.query_first(sql="SELECT name FROM pysql_bulk_update WHERE id = 4").name == "new-4"
+	assert conn._on_transaction is False
+
+	with pytest.raises(ValueError):
+		conn.bulk_update(table="pysql_bulk_update", rows=[{"id": 1}])
+
+	with pytest.raises(ValueError):
+		conn.bulk_update(table="pysql_bulk_update", rows=[{"name": "a"}])
+
+	with pytest.raises(TypeError):
+		conn.bulk_delete(table="pysql_bulk_update", keys=1)
+
+	conn.execute(sql="DROP TABLE pysql_bulk_update;")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_bulk_reserved_and_mixed_case_columns(db):
+	conn: PySQLXEngineSync = db()
+	key, order, user = [quote_identifier(conn._provider, name) for name in ("Key", "order", "user")]
+	conn.execute(sql="DROP TABLE IF EXISTS pysql_bulk_reserved;")
+	conn.execute(sql=f"CREATE TABLE pysql_bulk_reserved ({key} INT PRIMARY KEY, {order} INT, {user} VARCHAR(50));")
+
+	columns = ["Key", "order", "user"]
+	rows = [(i, i, f"user-{i}") for i in range(10)]
+	assert conn.bulk_insert(table="pysql_bulk_reserved", columns=columns, rows=rows) == 10
+
+	rows = [{"Key": 9, "order": 90, "user": "new"}, {"Key": 10, "order": 10, "user": "user-10"}]
+	assert conn.bulk_upsert(table="pysql_bulk_reserved", columns=columns, rows=rows, key_columns=["Key"]) > 0
+	assert conn.bulk_update(table="pysql_bulk_reserved", rows=[{"Key": 0, "order": 100}], key="Key") == 1
+	assert conn.bulk_delete(table="pysql_bulk_reserved", keys=[1, 2], key="Key") == 2
+
+	resp = conn.query_first(sql=f"SELECT COUNT(*) AS total, SUM({order}) AS orders FROM pysql_bulk_reserved")
+	assert (resp.total, resp.orders) == (9, 45 - 9 + 90 + 10 + 100 - 3)
+	assert conn.query_first(sql=f"SELECT {user} AS name FROM pysql_bulk_reserved WHERE {key} = 9").name == "new"
+
+	conn.execute(sql="DROP TABLE pysql_bulk_reserved;")
+	conn.close()
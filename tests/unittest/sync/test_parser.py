@@ -0,0 +1,115 @@
+import gc
+import logging
+import timeit
+import weakref
+from typing import List
+
+import pytest
+
+from pysqlx_engine import BaseRow, LazyRows, PySQLXEngineSync
+from pysqlx_engine._core.const import PYDANTIC_IS_V1
+from pysqlx_engine._core.util import parse_obj_as
+from tests.common import db_sqlite
+
+ROWS = [{"id": i, "name": f"name-{i}", "amount": i * 1.5} for i in range(10)]
+
+
+class Row(BaseRow):
+	id: int
+	name: str
+	amount: float
+
+
+def test_parse_obj_as():
+	rows = parse_obj_as(type_=Row, obj=ROWS, many=True)
+	assert len(rows) == 10
+	assert all(isinstance(row, Row) for row in rows)
+
+	row = parse_obj_as(type_=Row, obj=ROWS[0])
+	assert isinstance(row, Row)
+	assert row.id == 0
+
+
+def test_parse_obj_as_does_not_keep_the_model_alive():
+	conn: PySQLXEngineSync = db_sqlite()
+
+	class MyModel(BaseRow):
+		id: int
+
+	conn.query(sql="SELECT 1 AS id", model=MyModel)
+	ref = weakref.ref(MyModel)
+	del MyModel
+	gc.collect()
+	assert ref() is None
+
+	conn.close()
+
+
+@pytest.mark.skipif(PYDANTIC_IS_V1, reason="TypeAdapter is only available on pydantic v2")
+def test_parse_obj_as_benchmark():
+	from pydantic import TypeAdapter
+
+	number = 500
+	before = timeit.timeit(lambda: TypeAdapter(List[Row]).validate_python(ROWS), number=number) / number
+	after = timeit.timeit(lambda: parse_obj_as(type_=Row, obj=ROWS, many=True), number=number) / number
+
+	logging.getLogger("pysqlx_engine").info(
+		f"parse 10 rows: TypeAdapter per call {before * 1e6:.1f}us, reused validator {after * 1e6:.1f}us"
+	)
+	assert after < before
+
+
+def test_lazy_rows():
+	rows = LazyRows(rows=[dict(row) for row in ROWS], model=Row)
+	assert len(rows) == 10
+	assert repr(rows) == "<LazyRows rows=10 loaded=0>"
+
+	first = rows[0]
+	assert isinstance(first, Row)
+	assert rows[0] is first
+	assert rows[-1].id == 9
+	assert [row.id for row in rows[2:5]] == [2, 3, 4]
+	assert repr(rows) == "<LazyRows rows=10 loaded=5>"
+
+	with pytest.raises(IndexError):
+		rows[10]
+
+	assert [row.id for row in rows] == list(range(10))
+	assert rows == parse_obj_as(type_=Row, obj=ROWS, many=True)
+
+
+def test_lazy_rows_validates_on_access():
+	from pydantic import ValidationError
+
+	rows = LazyRows(
+		rows=[{"id": 1, "name": "a", "amount": 1.0}, {"id": "invalid", "name": "b", "amount": 1.0}], model=Row
+	)
+	assert rows[0].id == 1
+	with pytest.raises(ValidationError):
+		rows[1]
+
+	rows = LazyRows(rows=[{"id": "invalid", "name": "b", "amount": 1.0}], model=Row, trusted=True)
+	assert rows[0].id == "invalid"
+
+
+def test_trusted_checks_the_columns():
+	conn: PySQLXEngineSync = db_sqlite()
+
+	rows = conn.query(sql="SELECT 1 AS id, 'a' AS name, 1.5 AS amount", model=Row, trusted=True)
+	assert rows[0].name == "a"
+
+	with pytest.raises(ValueError, match="amount"):
+		conn.query(sql="SELECT 1 AS id, 'a' AS name", model=Row, trusted=True)
+
+	with pytest.raises(ValueError, match="other"):
+		conn.query_first(sql="SELECT 1 AS id, 'a' AS name, 1.5 AS amount, 2 AS other", model=Row, trusted=True)
+
+	with pytest.raises(ValueError, match="amount"):
+		conn.prepare(sql="SELECT 1 AS id, 'a' AS name", model=Row, trusted=True).query()
+
+	class WithDefault(BaseRow):
+		id: int
+		name: str = "default"
+
+	assert conn.query_first(sql="SELECT 1 AS id", model=WithDefault, trusted=True).name == "default"
+	conn.close()
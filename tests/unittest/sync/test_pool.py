@@ -6,6 +6,8 @@ import unittest.mock
 import pytest
 
 from pysqlx_engine import PySQLXEnginePoolSync as PySQLXEnginePool
+from pysqlx_engine import PySQLXEngineSync
+from pysqlx_engine._core.abc.base_pool import Histogram, IdleStack
 from pysqlx_engine._core.errors import (
 	PoolAlreadyClosedError,
 	PoolAlreadyStartedError,
@@ -146,7 +148,7 @@ def test_pool_initialization_raise():
 def test_monitor_break_if_queue_is_empty():
 	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1)
 	pool._opened = True
-	with unittest.mock.patch.object(pool._pool, "get_nowait", side_effect=queue.Empty):
+	with unittest.mock.patch.object(IdleStack, "get_oldest_nowait", return_value=[]):
 		monitor = Monitor(pool=pool)
 		assert pool._name in repr(monitor)
 		pool._pool.put_nowait("test")
@@ -180,12 +182,13 @@ def test_pool_stop_raise():
 
 
 def test_pool_timeout_raise():
-	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, conn_timeout=1)
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=2, conn_timeout=1)
 	pool.start()
 	time.sleep(1)
-	with pool.connection() as conn:
+	with pool.connection() as conn, pool.connection() as _:
 		assert conn is not None, "Connection should not be None"
 		assert pool._pool.qsize() < 1, "Connection should be removed from the pool"
+		assert pool._size == pool._max_size, "The pool should grow up to max_size"
 		with pytest.raises(PoolTimeoutError):
 			with pool.connection() as _:
 				...  # pragma: no cover
@@ -213,7 +216,7 @@ def test_pool_on_transaction():
 		assert conn is not None, "Connection should not be None"
 		assert pool._pool.qsize() < 1, "Connection should be removed from the pool"
 		conn.start_transaction()
-	pool._pool.qsize() == 0
+	assert pool._pool.qsize() == 1, "The connection is rolled back and returned to the pool"
 	pool.stop()
 
 
@@ -227,7 +230,7 @@ def test_pool_start_twice():
 
 def test_pool_start_generate_raise():
 	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1)
-	with unittest.mock.patch.object(pool._pool, "put", side_effect=Exception):
+	with unittest.mock.patch.object(IdleStack, "put_nowait", side_effect=Exception):
 		with pytest.raises(Exception):
 			pool.start()
 
@@ -245,10 +248,62 @@ def test_pool_get_conn():
 def test_pool_get_ready_conn():
 	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=10, conn_timeout=3)
 	pool.start()
-	with unittest.mock.patch.object(pool._pool, "get", side_effect=queue.Empty):
-		assert pool._get_ready_conn() is None
+	conns = [pool._get_ready_conn(timeout=1) for _ in range(pool._max_size)]
+	assert all(conn is not None for conn in conns)
+	assert pool._get_ready_conn(timeout=0.1) is None
+	assert len(pool._waiters) == 0, "The waiter should be removed on timeout"
+	for conn in conns:
+		pool._put_conn_unchecked(conn)
+
+	pool.stop()
+
+
+def test_pool_hands_connection_to_waiter():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=10, conn_timeout=5)
+	pool.start()
+	order = []
+
+	def use(name: str, hold: float):
+		with pool.connection():
+			order.append(name)
+			time.sleep(hold)
+
+	first = threading.Thread(target=use, args=("first", 0.2))
+	first.start()
+	time.sleep(0.05)
+	waiters = []
+	for i in range(3):
+		waiters.append(threading.Thread(target=use, args=(f"waiter-{i}", 0.01)))
+		waiters[-1].start()
+		time.sleep(0.01)
+	for t in (first, *waiters):
+		t.join()
 
+	assert order == ["first", "waiter-0", "waiter-1", "waiter-2"], "Waiters should be served in FIFO order"
+	assert not pool._waiters, "All the waiters should be served"
+	pool.stop()
+
+
+def test_pool_stop_wakes_waiters():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=10, conn_timeout=5)
+	pool.start()
+	conns = [pool._get_conn() for _ in range(pool._max_size)]
+	errors = queue.Queue()
+
+	def wait():
+		try:
+			pool._get_conn()
+		except PoolClosedError as e:
+			errors.put(e)
+
+	t = threading.Thread(target=wait)
+	t.start()
+	time.sleep(0.05)
 	pool.stop()
+	t.join(timeout=2)
+	assert isinstance(errors.get_nowait(), PoolClosedError)
+	for conn in conns:
+		conn.close()
 
 
 def test_pool_put_conn_unchecked_raise():
@@ -266,28 +321,316 @@ def test_pool_put_conn_unchecked_raise():
 	pool.stop()
 
 
-def test_monitor_growing_creates_new_connections():
-	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, check_interval=0.5)
-	pool._opened = True
-	pool._put_conn(pool._new_conn_unchecked())
-	# Initially, the pool should have min_size connections
+def test_pool_grows_with_the_waiters():
+	pool = get_pool(uri=SQLITE_URI, min_size=1, max_size=10, check_interval=10, max_concurrent_connects=4)
 	assert pool._size == 1
-	# Set the pool to grow
-	pool._growing = True
 
-	monitor = Monitor(pool=pool)
-	t = threading.Thread(target=monitor.run, daemon=True)
-	t.start()
-	time.sleep(2)
-	pool._opened = False
-	# Check if a new connection is created when the pool is growing
-	assert pool._size == 2
-	t.join()
+	connecting = []
+	new_conn_unchecked = pool._new_conn_unchecked
 
+	def new_conn():
+		connecting.append(pool._connecting)
+		return new_conn_unchecked()
 
-def test_check_grow():
-	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=2, check_interval=10)
+	pool._new_conn_unchecked = new_conn
+
+	def use():
+		with pool.connection():
+			time.sleep(0.3)
+
+	threads = [threading.Thread(target=use) for _ in range(6)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+
+	assert 1 < pool._size <= 6, "The pool should grow with the waiters"
+	assert 1 < max(connecting) <= 4, "The connections should be opened in parallel up to max_concurrent_connects"
+	assert pool._connecting == 0
+	pool.stop()
+
+
+def test_pool_counters_with_concurrent_growth():
+	pool = get_pool(uri=SQLITE_URI, min_size=1, max_size=8, check_interval=10, max_concurrent_connects=8)
+
+	def use():
+		for _ in range(5):
+			with pool.connection():
+				time.sleep(0.01)
+
+	threads = [threading.Thread(target=use) for _ in range(16)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+
+	stats = pool.stats()
+	assert stats.size == len(pool._conns) <= 8
+	assert stats.created - stats.closed == stats.size, "The counters should not lose updates"
+	assert stats.acquire_wait.count == stats.hold_time.count == 80
+	pool.stop()
+	assert pool._growers == []
+	assert pool.stats().size == 0
+
+
+def test_conns_to_grow():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=10, check_interval=10, max_concurrent_connects=3)
 	pool._size = 2
-	assert pool._waiting == 0
-	assert pool._growing is False
-	assert pool._check_grow(1) is None
+	assert pool._conns_to_grow(waiting=0) == 0
+	assert pool._conns_to_grow(waiting=2) == 2
+	assert pool._conns_to_grow(waiting=20) == 3
+
+	pool._connecting = 2
+	assert pool._conns_to_grow(waiting=2) == 0
+	assert pool._conns_to_grow(waiting=5) == 1
+
+	pool._connecting = 0
+	pool._size = 9
+	assert pool._conns_to_grow(waiting=5) == 1
+
+	with pytest.raises(AssertionError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_concurrent_connects=0)
+
+
+@pytest.mark.parametrize("uri", [SQLITE_URI, PGSQL_URI, MSSQL_URI, MYSQL_URI])
+def test_pool_reuses_the_core_connection(uri: str):
+	pool = get_pool(uri=uri, min_size=1, check_interval=10)
+	with pool.connection() as conn:
+		conn.query(sql="SELECT 1 AS id")
+		first, core = conn, conn._conn
+
+	with pool.connection() as conn:
+		assert conn is first, "The idle connection should be reused"
+		conn.query(sql="SELECT 1 AS id")
+		assert conn._conn is core, "The prepared statements of the core are kept with its connection"
+	pool.stop()
+
+
+def test_can_trim():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=10, idle_timeout=10, min_idle=1, max_idle=4)
+	conn = unittest.mock.Mock(returned_at=time.monotonic())
+	pool._size = 5
+	assert pool._can_trim(conn=conn, idle=2, trimmed=0) is False
+	assert pool._can_trim(conn=conn, idle=4, trimmed=3) is True
+
+	conn.returned_at -= 11
+	assert pool._can_trim(conn=conn, idle=2, trimmed=0) is True
+	assert pool._can_trim(conn=conn, idle=2, trimmed=1) is False, "Only one connection is trimmed per check"
+	assert pool._can_trim(conn=conn, idle=0, trimmed=0) is False, "The min_idle is kept"
+
+	pool._size = 1
+	assert pool._can_trim(conn=conn, idle=4, trimmed=0) is False, "The min_size is kept"
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, min_idle=-1)
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, min_idle=3, max_idle=2)
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, max_size=2, max_idle=3)
+
+	with pytest.raises(AssertionError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, idle_timeout=0)
+
+
+def test_pool_trims_idle_connections():
+	pool = get_pool(uri=SQLITE_URI, min_size=1, max_size=5, check_interval=0.1, idle_timeout=0.3)
+	conns = [pool._get_conn() for _ in range(4)]
+	for conn in conns:
+		pool._put_conn(conn)
+	assert pool._size == 4
+
+	sizes = []
+	for _ in range(30):
+		sizes.append(pool._size)
+		if pool._size == 1:
+			break
+		time.sleep(0.1)
+
+	assert pool._size == 1
+	assert 3 in sizes and 2 in sizes, "The pool shrinks progressively"
+	pool.stop()
+
+
+def test_pool_keeps_min_and_max_idle():
+	pool = get_pool(uri=SQLITE_URI, min_size=1, max_size=5, check_interval=0.1, idle_timeout=None, max_idle=2)
+	conns = [pool._get_conn() for _ in range(4)]
+	for conn in conns:
+		pool._put_conn(conn)
+	time.sleep(0.5)
+	assert pool._size == 2
+	pool.stop()
+
+	pool = get_pool(uri=SQLITE_URI, min_size=1, max_size=3, check_interval=0.1, min_idle=2)
+	time.sleep(0.5)
+	assert pool._size == 2
+	with pool.connection():
+		time.sleep(0.5)
+		assert pool._size == 3
+		assert pool._pool.qsize() == 2
+	pool.stop()
+
+
+@pytest.mark.parametrize("policy", ["lifo", "fifo"])
+def test_idle_stack(policy: str):
+	stack = IdleStack(maxsize=3, policy=policy)
+	assert stack.empty()
+	for conn in ("a", "b", "c"):
+		stack.put_nowait(conn)
+	with pytest.raises(queue.Full):
+		stack.put_nowait("d")
+
+	conn = stack.get_nowait()
+	assert conn == ("c" if policy == "lifo" else "a")
+	stack.put_nowait(conn)
+
+	oldest = stack.get_oldest_nowait(2)
+	assert oldest == (["a", "b"] if policy == "lifo" else ["b", "c"])
+	stack.put_nowait("d")
+	assert stack.put_oldest_nowait(oldest) == oldest[1:], "Only one connection fits"
+	assert stack.qsize() == 3
+
+	# the connections put back are taken last
+	taken = [stack.get_nowait() for _ in range(3)]
+	assert taken[-1] == oldest[0]
+
+	with pytest.raises(queue.Empty):
+		stack.get_nowait()
+
+
+@pytest.mark.parametrize("policy", ["lifo", "fifo"])
+def test_pool_policy(policy: str):
+	pool = get_pool(uri=SQLITE_URI, min_size=3, max_size=4, check_interval=10, policy=policy)
+	time.sleep(0.2)  # the monitor checks the idle connections on start
+	with pool.connection() as first:
+		...
+	with pool.connection() as conn:
+		assert (conn is first) is (policy == "lifo")
+	pool.stop()
+
+	with pytest.raises(ValueError):
+		PySQLXEnginePool(uri=SQLITE_URI, min_size=1, policy="random")
+
+
+def test_histogram():
+	histogram = Histogram(buckets=(0.1, 1.0))
+	for value in (0.05, 0.1, 0.5, 2.0):
+		histogram.record(value)
+
+	info = histogram.info()
+	assert info.buckets == (0.1, 1.0)
+	assert info.counts == (2, 1, 1)
+	assert info.count == 4
+	assert info.sum == pytest.approx(2.65)
+	assert info.max == 2.0
+
+
+def test_pool_stats():
+	pool = get_pool(uri=SQLITE_URI, min_size=2, max_size=3, check_interval=10, conn_timeout=0.2)
+	stats = pool.stats()
+	assert (stats.size, stats.idle, stats.in_use, stats.waiting) == (2, 2, 0, 0)
+	assert (stats.created, stats.closed, stats.failed, stats.timeouts) == (2, 0, 0, 0)
+	assert stats.age.count == 2
+
+	conns = [pool._get_conn() for _ in range(3)]
+	stats = pool.stats()
+	assert (stats.size, stats.idle, stats.in_use) == (3, 0, 3)
+	assert stats.created == 3
+	assert stats.acquire_wait.count == 3
+
+	with pytest.raises(PoolTimeoutError):
+		pool._get_conn()
+	assert pool.stats().timeouts == 1
+
+	time.sleep(0.01)
+	for conn in conns:
+		pool._put_conn(conn)
+	stats = pool.stats()
+	assert (stats.idle, stats.in_use) == (3, 0)
+	assert stats.hold_time.count == 3
+	assert stats.hold_time.sum >= 0.03
+	pool.stop()
+
+	stats = pool.stats()
+	assert (stats.size, stats.closed, stats.age.count) == (0, 3, 0)
+
+	pool = PySQLXEnginePool(uri="sqlite:/invalid/path/db.db", min_size=1)
+	with pytest.raises(Exception):
+		pool.start()
+	assert pool.stats().failed == 1
+
+
+def test_check_health_check():
+	pool = PySQLXEnginePool(uri=SQLITE_URI, min_size=1)
+	assert (pool._health_check, pool._health_check_idle) == ("periodic", 0.0)
+	assert pool._check_health_check("never") == ("never", 0.0)
+	assert pool._check_health_check("on_borrow_if_idle_gt=2.5") == ("on_borrow", 2.5)
+
+	for health_check in ("always", "on_borrow_if_idle_gt", "on_borrow_if_idle_gt=-1", "on_borrow_if_idle_gt=x"):
+		with pytest.raises(ValueError):
+			PySQLXEnginePool(uri=SQLITE_URI, min_size=1, health_check=health_check)
+
+
+def test_pool_verify():
+	pool = get_pool(uri=SQLITE_URI, min_size=1, check_interval=10, ping_sql="SELECT 1")
+	conn = pool._get_conn()
+	with unittest.mock.patch.object(PySQLXEngineSync, "raw_cmd", side_effect=Exception("broken")) as ping:
+		conn.last_verified = time.monotonic()
+		assert pool._verify(conn=conn, idle=10) is True, "A connection verified recently is not pinged"
+		assert ping.call_count == 0
+
+		conn.last_verified -= 11
+		assert pool._verify(conn=conn, idle=10) is False
+		assert ping.call_count == 1
+
+	verified = conn.last_verified
+	assert pool._verify(conn=conn, idle=0) is True
+	assert conn.last_verified > verified
+	pool._put_conn(conn)
+	pool.stop()
+
+
+def test_pool_health_check_on_borrow():
+	pool = get_pool(
+		uri=SQLITE_URI, min_size=1, check_interval=10, health_check="on_borrow_if_idle_gt=0", ping_sql="SELECT 1"
+	)
+	with pool.connection() as first:
+		...
+
+	with unittest.mock.patch.object(PySQLXEngineSync, "raw_cmd", side_effect=[Exception("broken"), None]) as ping:
+		time.sleep(0.01)
+		with pool.connection() as conn:
+			assert conn is not first, "The broken connection is replaced"
+		assert ping.call_count == 2
+
+	stats = pool.stats()
+	assert (stats.size, stats.closed) == (1, 1)
+	pool.stop()
+
+
+def test_pool_resets_connection_on_return():
+	pool = get_pool(uri=SQLITE_URI, min_size=1, check_interval=10, reset_sql="SELECT 1")
+	with pool.connection() as conn:
+		conn.execute(sql="DROP TABLE IF EXISTS pysql_pool_reset")
+		conn.execute(sql="CREATE TABLE pysql_pool_reset (id INTEGER)")
+		conn.start_transaction()
+		conn.execute(sql="INSERT INTO pysql_pool_reset (id) VALUES (1)")
+		first = conn
+
+	with pool.connection() as conn:
+		assert conn is first, "The connection is rolled back and reused"
+		assert conn._on_transaction is False
+		assert conn.query(sql="SELECT id FROM pysql_pool_reset") == []
+		conn.execute(sql="DROP TABLE pysql_pool_reset")
+	pool.stop()
+
+	pool = get_pool(uri=SQLITE_URI, min_size=1, check_interval=10, reset_sql="INVALID SQL")
+	with pool.connection() as conn:
+		conn.start_transaction()
+		first = conn
+
+	assert pool.stats().closed == 1, "The connection is closed when the reset fails"
+	with pool.connection() as conn:
+		assert conn is not first
+	pool.stop()
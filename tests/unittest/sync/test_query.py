@@ -5,9 +5,10 @@ from decimal import Decimal
 
 import pytest
 
-from pysqlx_engine import BaseRow, PySQLXEngineSync
+from pysqlx_engine import BaseRow, PreparedQuerySync, PySQLXEngineSync
 from pysqlx_engine._core.const import LOG_CONFIG
 from pysqlx_engine._core.errors import ParameterInvalidValueError, QueryError
+from pysqlx_engine.errors import NotConnectedError
 from tests.common import db_mssql, db_mysql, db_pgsql, db_sqlite
 
 
@@ -1274,3 +1275,332 @@ def test_query_first_enum_param_invalid_value(db: PySQLXEngineSync):
 
 	conn.close()
 	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_reuses_generated_model(db: PySQLXEngineSync):
+	from pysqlx_engine._core.parser import MODEL_CACHE
+
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	first = conn.query_first(sql="SELECT 1 AS id, 'Rian' AS name")
+	hits = MODEL_CACHE.info().hits
+
+	second = conn.query_first(sql="SELECT 2 AS id, 'Carlos' AS name")
+	assert type(first) is type(second)
+	assert MODEL_CACHE.info().hits == hits + 1
+
+	other = conn.query_first(sql="SELECT 1 AS number")
+	assert type(other) is not type(first)
+
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_trusted(db: PySQLXEngineSync):
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	class MyModel(BaseRow):
+		id: float
+		name: str
+
+	sql = "SELECT 1 AS id, 'Rian' AS name"
+	assert conn.query(sql=sql, trusted=True) == conn.query(sql=sql)
+
+	rows = conn.query(sql=sql, model=MyModel, trusted=True)
+	assert isinstance(rows[0], MyModel)
+	assert isinstance(rows[0].id, int)  # not coerced to float
+
+	row = conn.query_first(sql=sql, model=MyModel, trusted=True)
+	assert isinstance(row.id, int)
+
+	row = conn.query_first(sql=sql, model=MyModel)
+	assert isinstance(row.id, float)
+
+	conn.close()
+	assert conn.connected is False
+
+
+def test_query_trusted_engine_default():
+	from tests.common import SQLITE_URI
+
+	conn = PySQLXEngineSync(uri=SQLITE_URI, trusted=True)
+	conn.connect()
+
+	class MyModel(BaseRow):
+		id: float
+
+	assert isinstance(conn.query_first(sql="SELECT 1 AS id", model=MyModel).id, int)
+	assert isinstance(conn.query_first(sql="SELECT 1 AS id", model=MyModel, trusted=False).id, float)
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_as_tuples(db: PySQLXEngineSync):
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	sql = "SELECT 1 AS id, 'Rian' AS name"
+	columns, rows = conn.query_as_tuples(sql=sql)
+	assert columns == ("id", "name")
+	assert rows == [(1, "Rian")]
+
+	columns, rows = conn.query_as_tuples(sql=sql, named=True)
+	assert rows[0].id == 1
+	assert rows[0].name == "Rian"
+
+	columns, row = conn.query_first_as_tuple(sql="SELECT :number AS number", parameters={"number": 10})
+	assert columns == ("number",)
+	assert row == (10,)
+
+	columns, row = conn.query_first_as_tuple(sql=sql, named=True)
+	assert type(row) is type(rows[0])
+
+	conn.execute(sql="CREATE TABLE pysql_empty (id INT)")
+	assert conn.query_as_tuples(sql="SELECT * FROM pysql_empty") == ((), [])
+	assert conn.query_first_as_tuple(sql="SELECT * FROM pysql_empty") == ((), None)
+	conn.execute(sql="DROP TABLE pysql_empty")
+
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_as_columns(db: PySQLXEngineSync):
+	from array import array
+
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	conn.execute(sql="CREATE TABLE pysql_columns (id INT, name VARCHAR(10), age INT)")
+	conn.execute(sql="INSERT INTO pysql_columns (id, name, age) VALUES (1, 'Rian', 28), (2, 'Carlos', NULL)")
+
+	data = conn.query_as_columns(sql="SELECT id, name, age FROM pysql_columns ORDER BY id")
+	assert isinstance(data["id"], array)
+	assert list(data["id"]) == [1, 2]
+	assert data["name"] == ["Rian", "Carlos"]
+	assert data["age"] == [28, None]
+
+	conn.execute(sql="DELETE FROM pysql_columns")
+	assert conn.query_as_columns(sql="SELECT * FROM pysql_columns") == {}
+
+	conn.execute(sql="DROP TABLE pysql_columns")
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_as_numpy(db: PySQLXEngineSync):
+	numpy = pytest.importorskip("numpy")
+
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	result = conn.query_as_numpy(sql="SELECT 1 AS id, 1.5 AS amount, 'Rian' AS name")
+	assert isinstance(result, numpy.ndarray)
+	assert result.dtype["id"] == numpy.dtype("i8")
+	assert result.dtype["name"] == numpy.dtype("O")
+	assert result["id"].tolist() == [1]
+	assert result["name"].tolist() == ["Rian"]
+
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_as_dataframe(db: PySQLXEngineSync):
+	pytest.importorskip("pandas")
+
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	df = conn.query_as_dataframe(sql="SELECT 1 AS id, 'Rian' AS name")
+	assert list(df.columns) == ["id", "name"]
+	assert df["id"].tolist() == [1]
+	assert df["name"].tolist() == ["Rian"]
+
+	conn.close()
+	assert conn.connected is False
+
+
+def test_query_as_numpy_without_numpy():
+	import unittest.mock
+
+	conn: PySQLXEngineSync = db_sqlite()
+	with unittest.mock.patch.dict("sys.modules", {"numpy": None}):
+		with pytest.raises(ImportError):
+			conn.query_as_numpy(sql="SELECT 1 AS id")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_lazy(db: PySQLXEngineSync):
+	from pysqlx_engine import LazyRows
+
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	sql = "SELECT 1 AS id, 'Rian' AS name"
+	rows = conn.query(sql=sql, lazy=True)
+	assert isinstance(rows, LazyRows)
+	assert rows == conn.query(sql=sql)
+
+	class MyModel(BaseRow):
+		id: int
+		name: str
+
+	rows = conn.query(sql=sql, model=MyModel, lazy=True)
+	assert isinstance(rows[0], MyModel)
+
+	conn.execute(sql="CREATE TABLE pysql_empty (id INT)")
+	rows = conn.query(sql="SELECT * FROM pysql_empty", lazy=True)
+	assert len(rows) == 0
+	assert rows == []
+	conn.execute(sql="DROP TABLE pysql_empty")
+
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_stream(db: PySQLXEngineSync):
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	conn.execute(sql="CREATE TABLE pysql_stream (id INT, name VARCHAR(10))")
+	values = ", ".join(f"({i}, 'name-{i}')" for i in range(1, 26))
+	conn.execute(sql=f"INSERT INTO pysql_stream (id, name) VALUES {values}")
+
+	rows = list(conn.query_stream(sql="SELECT id, name FROM pysql_stream", key="id", batch_size=10))
+	assert [row.id for row in rows] == list(range(1, 26))
+
+	batches = list(conn.query_stream(sql="SELECT * FROM pysql_stream;", batch_size=10, batch=True))
+	assert [len(batch) for batch in batches] == [10, 10, 5]
+
+	sql = "SELECT id FROM pysql_stream WHERE id > :min_id"
+	rows = list(conn.query_stream(sql=sql, parameters={"min_id": 20}, batch_size=2))
+	assert [row.id for row in rows] == [21, 22, 23, 24, 25]
+
+	with pytest.raises(ValueError):
+		list(conn.query_stream(sql="SELECT name FROM pysql_stream", key="id; DROP TABLE pysql_stream"))
+
+	with pytest.raises(ValueError):
+		list(conn.query_stream(sql="SELECT name FROM pysql_stream", batch_size=0))
+
+	conn.execute(sql="INSERT INTO pysql_stream (id, name) VALUES (10, 'repeated')")
+	with pytest.raises(ValueError, match="unique"):
+		list(conn.query_stream(sql="SELECT id, name FROM pysql_stream", batch_size=10))
+
+	conn.execute(sql="DROP TABLE pysql_stream")
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql])
+def test_query_first_with_data_modifying_cte(db: PySQLXEngineSync):
+	conn: PySQLXEngineSync = db()
+	conn.execute(sql="CREATE TABLE pysql_first_cte (id INT, name VARCHAR(10))")
+	conn.execute(sql="INSERT INTO pysql_first_cte (id, name) VALUES (1, 'a'), (2, 'b')")
+
+	row = conn.query_first(sql="WITH x AS (SELECT 1 AS id) UPDATE pysql_first_cte SET name = 'c' RETURNING *")
+	assert row.name == "c"
+	assert conn.query_first(sql="SELECT COUNT(*) AS total FROM pysql_first_cte WHERE name = 'c'").total == 2
+
+	sql = "WITH x AS (SELECT 1 AS id) DELETE FROM pysql_first_cte WHERE id IN (SELECT id FROM x) RETURNING id"
+	assert conn.query_first(sql=sql).id == 1
+
+	sql = "WITH x AS (SELECT 3 AS id) INSERT INTO pysql_first_cte (id, name) SELECT id, 'd' FROM x RETURNING id"
+	assert conn.query_first(sql=sql).id == 3
+
+	conn.execute(sql="DROP TABLE pysql_first_cte")
+	conn.close()
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_query_first_fetches_one_row(db: PySQLXEngineSync):
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	conn.execute(sql="CREATE TABLE pysql_first (id INT, name VARCHAR(10))")
+	values = ", ".join(f"({i}, 'name-{i}')" for i in range(1, 26))
+	conn.execute(sql=f"INSERT INTO pysql_first (id, name) VALUES {values}")
+
+	row = conn.query_first(sql="SELECT id, name FROM pysql_first ORDER BY id DESC;")
+	assert row.id == 25
+
+	row = conn.query_first_as_dict(
+		sql="SELECT id, name FROM pysql_first WHERE id > :id ORDER BY id", parameters={"id": 5}
+	)
+	assert row == {"id": 6, "name": "name-6"}
+
+	row = conn.query_first_as_tuple(sql="SELECT DISTINCT id FROM pysql_first ORDER BY id DESC")
+	assert row == (("id",), (25,))
+
+	conn.execute(sql="DROP TABLE pysql_first")
+	conn.close()
+	assert conn.connected is False
+
+
+@pytest.mark.parametrize("db", [db_sqlite, db_pgsql, db_mssql, db_mysql])
+def test_prepare(db: PySQLXEngineSync):
+	conn: PySQLXEngineSync = db()
+	assert conn.connected is True
+
+	class Item(BaseRow):
+		id: int
+		name: str
+
+	conn.execute(sql="CREATE TABLE pysql_prepare (id INT, name VARCHAR(10))")
+	insert = conn.prepare(
+		sql="INSERT INTO pysql_prepare (id, name) VALUES (:id, :name)", param_types={"id": int, "name": str}
+	)
+	for i in range(1, 6):
+		assert insert.execute(parameters={"id": i, "name": f"name-{i}"}) == 1
+
+	select = conn.prepare(sql="SELECT id, name FROM pysql_prepare WHERE id >= :id ORDER BY id", model=Item)
+	assert isinstance(select, PreparedQuerySync)
+	rows = select(parameters={"id": 3})
+	assert [row.id for row in rows] == [3, 4, 5]
+	assert all(isinstance(row, Item) for row in rows)
+	assert select.query(parameters={"id": 10}) == []
+	assert select.query_first(parameters={"id": 2}) == Item(id=2, name="name-2")
+	assert select.query_first(parameters={"id": 10}) is None
+
+	generated = conn.prepare(sql="SELECT id, name FROM pysql_prepare ORDER BY id")
+	assert generated.query_first().name == "name-1"
+	assert len(generated()) == 5
+
+	with pytest.raises(TypeError):
+		insert.execute(parameters={"id": 1})
+
+	with pytest.raises(TypeError):
+		insert.execute(parameters={"id": "1", "name": "a"})
+
+	with pytest.raises(TypeError):
+		insert.execute(parameters={"id": True, "name": "a"})
+
+	assert insert.execute(parameters={"id": 6, "name": None}) == 1
+
+	count = conn.prepare(sql="SELECT COUNT(*) AS total FROM pysql_prepare", param_types={})
+	assert (count.query_first()).total == 6
+	with pytest.raises(TypeError):
+		count.query(parameters={"id": 1})
+
+	with pytest.raises(TypeError):
+		select.query(parameters={"id": object()})
+
+	with pytest.raises(TypeError):
+		conn.prepare(sql="SELECT 1", model=dict)
+
+	with pytest.raises(TypeError):
+		conn.prepare(sql="SELECT 1", param_types={"id": object})
+
+	conn.execute(sql="DROP TABLE pysql_prepare")
+	conn.close()
+	assert conn.connected is False
+
+	with pytest.raises(NotConnectedError):
+		select.query(parameters={"id": 1})